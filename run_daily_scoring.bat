@@ -53,6 +53,36 @@ if %errorlevel% neq 0 (
 )
 echo ✓ 일일 스코어링 완료
 
+REM 드리프트 점검: PSI가 임계값 이상이면 drift.py가 10으로 종료 → 재학습 후 오늘 스코어 다시 계산
+REM 재학습 기준일(--t0)은 180일 전: 라벨(t0 이후 90/180일 주문)이 모두 지나간 시점이어야 두 클래스가 생긴다
+REM score.py --mode retrain 종료 코드: 0 저장, 3 학습 불가(라벨 한 클래스 등, 기존 모델 유지), 그 외 오류
+REM (괄호 블록 안의 %변수%는 블록을 읽을 때 펼쳐지므로 기준일은 블록 밖에서 미리 계산)
+for /f %%d in ('powershell -NoProfile -Command "(Get-Date).AddDays(-180).ToString('yyyy-MM-dd')"') do set RETRAIN_T0=%%d
+python src/pipelines/drift.py --db build/ivd.db
+if %errorlevel% equ 10 (
+    echo 분포 변화가 감지되어 모델을 재학습합니다...
+    python src/pipelines/score.py --db build/ivd.db --mode retrain --t0 %RETRAIN_T0%
+    if errorlevel 4 (
+        echo 오류: 재학습 실패
+        pause
+        exit /b 1
+    )
+    if errorlevel 3 (
+        echo 경고: 재학습할 수 없어 기존 모델로 계속합니다 ^(기준일 %RETRAIN_T0%^).
+    ) else if errorlevel 1 (
+        echo 오류: 재학습 실패
+        pause
+        exit /b 1
+    ) else (
+        python src/pipelines/score.py --db build/ivd.db --mode score
+        if errorlevel 1 (
+            echo 오류: 스코어링 실패
+            pause
+            exit /b 1
+        )
+    )
+)
+
 echo.
 echo [4/4] BI 데이터 내보내기 중...
 python src/pipelines/score.py --db build/ivd.db --mode export
@@ -0,0 +1,32 @@
+-- bi_views.sql: Power BI 파생 컬럼을 SQLite 뷰로 (src/pipelines/bi_export.py의 ensure_bi_views가 적용)
+-- ODBC로 build/ivd.db에 바로 연결해도 내보내기 파일과 같은 값이 나오고, score.py / powerbi_connector.py의
+-- 내보내기는 accounts, bi_scores_daily를 이 뷰에서 그대로 읽어 옮겨 쓰기만 한다.
+--   기관규모: bed_count >= 200 대형, >= 50 중형, 그 외 소형 (bed_count가 NULL이면 NULL)
+--   스코어등급: p_win_90d >= 0.7 A, >= 0.4 B, 그 외 C (p_win_90d가 NULL이면 NULL)
+-- 아래 식 인덱스는 뷰의 CASE 식과 글자 그대로 같아야 플래너가 쓴다 (예: WHERE 스코어등급 = 'A').
+
+CREATE VIEW IF NOT EXISTS bi_accounts_v AS
+SELECT a.*,
+       CASE WHEN bed_count >= 200 THEN '대형' WHEN bed_count >= 50 THEN '중형'
+            WHEN bed_count IS NOT NULL THEN '소형' END AS 기관규모
+FROM accounts a;
+
+CREATE INDEX IF NOT EXISTS ix_accounts_size ON accounts(
+  (CASE WHEN bed_count >= 200 THEN '대형' WHEN bed_count >= 50 THEN '중형'
+        WHEN bed_count IS NOT NULL THEN '소형' END));
+
+CREATE VIEW IF NOT EXISTS bi_scores_daily_v AS
+SELECT s.*,
+       CASE WHEN p_win_90d >= 0.7 THEN 'A' WHEN p_win_90d >= 0.4 THEN 'B'
+            WHEN p_win_90d IS NOT NULL THEN 'C' END AS 스코어등급
+FROM bi_scores_daily s;
+
+-- 실행일 + 등급 조회 (최신 실행일의 A등급 계정 등)
+CREATE INDEX IF NOT EXISTS ix_bi_scores_daily_run_grade ON bi_scores_daily(run_date,
+  (CASE WHEN p_win_90d >= 0.7 THEN 'A' WHEN p_win_90d >= 0.4 THEN 'B'
+        WHEN p_win_90d IS NOT NULL THEN 'C' END));
+
+-- 최신 실행일의 스코어 + 등급 (bi_scores_latest와 같은 행)
+CREATE VIEW IF NOT EXISTS bi_scores_latest_v AS
+SELECT * FROM bi_scores_daily_v
+WHERE run_date = (SELECT MAX(run_date) FROM bi_scores_daily);
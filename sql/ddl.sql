@@ -6,7 +6,9 @@ CREATE TABLE IF NOT EXISTS ingest_log(
   table_name TEXT,
   row_count INTEGER,
   sha256 TEXT,
-  loaded_at TEXT
+  loaded_at TEXT,
+  file_size INTEGER,
+  file_mtime REAL
 );
 
 CREATE TABLE IF NOT EXISTS accounts(
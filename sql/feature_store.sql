@@ -0,0 +1,112 @@
+-- feature_store.sql: materialized feature tables + change tracking for incremental refresh
+-- feature_store holds the same columns as feature_view (plus anchor columns used to
+-- shift recency/age when t0 moves). Triggers record every account whose source rows
+-- were inserted/updated/deleted so src/pipelines/features.py refreshes only those.
+-- Refresh is only as incremental as the ingest: the default DELETE-then-reload / INSERT OR
+-- REPLACE path rewrites every row of the reloaded table, so every account in it is marked;
+-- ingest.py --upsert touches only new/changed rows. ingest.py --bulk drops these triggers for
+-- the session and marks the accounts of each loaded batch once (every account in the loaded
+-- files, a superset of the changed ones), then recreates them.
+-- The trigger bodies use ON CONFLICT DO NOTHING, not INSERT OR IGNORE: inside an ingest.py --upsert
+-- statement SQLite applies the outer statement's conflict policy to OR IGNORE and the second mark
+-- of an account would fail with a UNIQUE error.
+
+CREATE TABLE IF NOT EXISTS feature_store(
+  account_id INTEGER PRIMARY KEY,
+  t0_date TEXT,
+  bed_count INTEGER,
+  annual_test_volume INTEGER,
+  account_type TEXT,
+  state_region TEXT,
+  orders_cnt_180d INTEGER,
+  monetary_180d REAL,
+  order_recency_days INTEGER,
+  interactions_90d INTEGER,
+  demo_180d INTEGER,
+  outcome_pos_ratio REAL,
+  last_interact_recency_days INTEGER,
+  has_active_bid_due_30d INTEGER,
+  bids_submitted_90d INTEGER,
+  tickets_180d INTEGER,
+  p1_ratio REAL,
+  install_equipment_count_active INTEGER,
+  avg_equipment_age_years REAL,
+  -- anchors: recency/age are t0 - anchor, so a t0 change needs no re-aggregation
+  last_order_date TEXT,
+  last_interact_at TEXT,
+  install_date_jd_avg REAL
+);
+
+-- point-in-time snapshots written by src/pipelines/feature_engine.py (one row per account per t0)
+-- labels look forward from t0: y_close_90d = any order in (t0, t0+90], y_amount_180d = order total in (t0, t0+180]
+CREATE TABLE IF NOT EXISTS feature_backfill(
+  account_id INTEGER,
+  t0_date TEXT,
+  bed_count INTEGER,
+  annual_test_volume INTEGER,
+  account_type TEXT,
+  state_region TEXT,
+  orders_cnt_180d INTEGER,
+  monetary_180d REAL,
+  order_recency_days INTEGER,
+  interactions_90d INTEGER,
+  demo_180d INTEGER,
+  outcome_pos_ratio REAL,
+  last_interact_recency_days INTEGER,
+  has_active_bid_due_30d INTEGER,
+  bids_submitted_90d INTEGER,
+  tickets_180d INTEGER,
+  p1_ratio REAL,
+  install_equipment_count_active INTEGER,
+  avg_equipment_age_years REAL,
+  y_close_90d INTEGER,
+  y_amount_180d REAL,
+  PRIMARY KEY (account_id, t0_date)
+);
+
+CREATE TABLE IF NOT EXISTS feature_dirty(
+  account_id INTEGER PRIMARY KEY
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_orders_dirty_ins AFTER INSERT ON orders
+BEGIN INSERT INTO feature_dirty(account_id) SELECT NEW.account_id WHERE NEW.account_id IS NOT NULL ON CONFLICT DO NOTHING; END;
+CREATE TRIGGER IF NOT EXISTS trg_orders_dirty_upd AFTER UPDATE ON orders
+BEGIN INSERT INTO feature_dirty(account_id) SELECT OLD.account_id WHERE OLD.account_id IS NOT NULL
+  UNION SELECT NEW.account_id WHERE NEW.account_id IS NOT NULL ON CONFLICT DO NOTHING; END;
+CREATE TRIGGER IF NOT EXISTS trg_orders_dirty_del AFTER DELETE ON orders
+BEGIN INSERT INTO feature_dirty(account_id) SELECT OLD.account_id WHERE OLD.account_id IS NOT NULL ON CONFLICT DO NOTHING; END;
+CREATE TRIGGER IF NOT EXISTS trg_interactions_dirty_ins AFTER INSERT ON interactions
+BEGIN INSERT INTO feature_dirty(account_id) SELECT NEW.account_id WHERE NEW.account_id IS NOT NULL ON CONFLICT DO NOTHING; END;
+CREATE TRIGGER IF NOT EXISTS trg_interactions_dirty_upd AFTER UPDATE ON interactions
+BEGIN INSERT INTO feature_dirty(account_id) SELECT OLD.account_id WHERE OLD.account_id IS NOT NULL
+  UNION SELECT NEW.account_id WHERE NEW.account_id IS NOT NULL ON CONFLICT DO NOTHING; END;
+CREATE TRIGGER IF NOT EXISTS trg_interactions_dirty_del AFTER DELETE ON interactions
+BEGIN INSERT INTO feature_dirty(account_id) SELECT OLD.account_id WHERE OLD.account_id IS NOT NULL ON CONFLICT DO NOTHING; END;
+CREATE TRIGGER IF NOT EXISTS trg_bids_dirty_ins AFTER INSERT ON bids
+BEGIN INSERT INTO feature_dirty(account_id) SELECT NEW.account_id WHERE NEW.account_id IS NOT NULL ON CONFLICT DO NOTHING; END;
+CREATE TRIGGER IF NOT EXISTS trg_bids_dirty_upd AFTER UPDATE ON bids
+BEGIN INSERT INTO feature_dirty(account_id) SELECT OLD.account_id WHERE OLD.account_id IS NOT NULL
+  UNION SELECT NEW.account_id WHERE NEW.account_id IS NOT NULL ON CONFLICT DO NOTHING; END;
+CREATE TRIGGER IF NOT EXISTS trg_bids_dirty_del AFTER DELETE ON bids
+BEGIN INSERT INTO feature_dirty(account_id) SELECT OLD.account_id WHERE OLD.account_id IS NOT NULL ON CONFLICT DO NOTHING; END;
+CREATE TRIGGER IF NOT EXISTS trg_service_tickets_dirty_ins AFTER INSERT ON service_tickets
+BEGIN INSERT INTO feature_dirty(account_id) SELECT NEW.account_id WHERE NEW.account_id IS NOT NULL ON CONFLICT DO NOTHING; END;
+CREATE TRIGGER IF NOT EXISTS trg_service_tickets_dirty_upd AFTER UPDATE ON service_tickets
+BEGIN INSERT INTO feature_dirty(account_id) SELECT OLD.account_id WHERE OLD.account_id IS NOT NULL
+  UNION SELECT NEW.account_id WHERE NEW.account_id IS NOT NULL ON CONFLICT DO NOTHING; END;
+CREATE TRIGGER IF NOT EXISTS trg_service_tickets_dirty_del AFTER DELETE ON service_tickets
+BEGIN INSERT INTO feature_dirty(account_id) SELECT OLD.account_id WHERE OLD.account_id IS NOT NULL ON CONFLICT DO NOTHING; END;
+CREATE TRIGGER IF NOT EXISTS trg_install_base_dirty_ins AFTER INSERT ON install_base
+BEGIN INSERT INTO feature_dirty(account_id) SELECT NEW.account_id WHERE NEW.account_id IS NOT NULL ON CONFLICT DO NOTHING; END;
+CREATE TRIGGER IF NOT EXISTS trg_install_base_dirty_upd AFTER UPDATE ON install_base
+BEGIN INSERT INTO feature_dirty(account_id) SELECT OLD.account_id WHERE OLD.account_id IS NOT NULL
+  UNION SELECT NEW.account_id WHERE NEW.account_id IS NOT NULL ON CONFLICT DO NOTHING; END;
+CREATE TRIGGER IF NOT EXISTS trg_install_base_dirty_del AFTER DELETE ON install_base
+BEGIN INSERT INTO feature_dirty(account_id) SELECT OLD.account_id WHERE OLD.account_id IS NOT NULL ON CONFLICT DO NOTHING; END;
+CREATE TRIGGER IF NOT EXISTS trg_accounts_dirty_ins AFTER INSERT ON accounts
+BEGIN INSERT INTO feature_dirty(account_id) SELECT NEW.account_id WHERE NEW.account_id IS NOT NULL ON CONFLICT DO NOTHING; END;
+CREATE TRIGGER IF NOT EXISTS trg_accounts_dirty_upd AFTER UPDATE ON accounts
+BEGIN INSERT INTO feature_dirty(account_id) SELECT OLD.account_id WHERE OLD.account_id IS NOT NULL
+  UNION SELECT NEW.account_id WHERE NEW.account_id IS NOT NULL ON CONFLICT DO NOTHING; END;
+CREATE TRIGGER IF NOT EXISTS trg_accounts_dirty_del AFTER DELETE ON accounts
+BEGIN INSERT INTO feature_dirty(account_id) SELECT OLD.account_id WHERE OLD.account_id IS NOT NULL ON CONFLICT DO NOTHING; END;
@@ -0,0 +1,9 @@
+-- indexes.sql: secondary indexes for feature/label aggregation (account + date lookups)
+-- ingest.py --bulk drops these before a large load and rebuilds them afterwards.
+CREATE INDEX IF NOT EXISTS ix_orders_account_date ON orders(account_id, order_date);
+CREATE INDEX IF NOT EXISTS ix_interactions_account_time ON interactions(account_id, occurred_at);
+CREATE INDEX IF NOT EXISTS ix_bids_account_due ON bids(account_id, bid_due_date);
+CREATE INDEX IF NOT EXISTS ix_service_tickets_account_opened ON service_tickets(account_id, opened_at);
+CREATE INDEX IF NOT EXISTS ix_install_base_account ON install_base(account_id, status);
+CREATE INDEX IF NOT EXISTS ix_web_events_account_time ON web_events(account_id, occurred_at);
+CREATE INDEX IF NOT EXISTS ix_opportunities_account ON opportunities(account_id, created_at);
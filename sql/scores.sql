@@ -0,0 +1,52 @@
+-- scores.sql: storage for daily scores written by src/pipelines/score.py
+-- bi_scores_daily holds one row per (run_date, account_id); re-running score/export on
+-- the same day updates those rows instead of appending a second copy. Days older than
+-- the retention window are rolled into monthly per-account summaries in bi_scores_history
+-- (except --t0 backfill dates listed in score_backfill_dates).
+
+CREATE TABLE IF NOT EXISTS bi_scores_daily(
+  run_date TEXT,
+  account_id INTEGER,
+  t0_date TEXT,
+  p_win_90d REAL,
+  expected_amount_180d REAL,
+  expected_value REAL,
+  is_priority INTEGER
+);
+CREATE UNIQUE INDEX IF NOT EXISTS ux_bi_scores_daily_run_account ON bi_scores_daily(run_date, account_id);
+
+-- 계정별 마지막 스코어 + (피처 지문, 모델 버전): 바뀌지 않은 계정의 스코어를 이월할 때 사용
+CREATE TABLE IF NOT EXISTS score_cache(
+  account_id INTEGER PRIMARY KEY,
+  fingerprint INTEGER,
+  model_version TEXT,
+  p_win_90d REAL,
+  expected_amount_180d REAL,
+  expected_value REAL,
+  is_priority INTEGER
+);
+
+-- 보존 기간이 지난 일별 스코어의 월별 요약 (period = 'YYYY-MM')
+CREATE TABLE IF NOT EXISTS bi_scores_history(
+  account_id INTEGER,
+  period TEXT,
+  days_scored INTEGER,
+  first_run_date TEXT,
+  last_run_date TEXT,
+  avg_p_win_90d REAL,
+  max_p_win_90d REAL,
+  avg_expected_amount_180d REAL,
+  avg_expected_value REAL,
+  priority_days INTEGER,
+  PRIMARY KEY (account_id, period)
+);
+
+-- score.py --t0로 과거 시점을 재현해 저장한 run_date: 보존 기간 정리(월별 요약으로 압축)에서 제외
+CREATE TABLE IF NOT EXISTS score_backfill_dates(
+  run_date TEXT PRIMARY KEY
+);
+
+-- 최신 실행일의 스코어만 (MAX(run_date)와 해당 날짜 범위 모두 ux_bi_scores_daily_run_account 인덱스 사용)
+CREATE VIEW IF NOT EXISTS bi_scores_latest AS
+SELECT * FROM bi_scores_daily
+WHERE run_date = (SELECT MAX(run_date) FROM bi_scores_daily);
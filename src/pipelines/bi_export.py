@@ -0,0 +1,376 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Power BI 내보내기 공용 도우미: SQLite 테이블을 chunk 단위로 읽어 Excel에 스트리밍으로 쓴다.
+
+openpyxl write-only 모드는 행을 시트별 임시 파일로 바로 흘려 보내므로 통합 문서 전체를
+메모리에 들고 있지 않는다. 메모리는 chunk 크기(DataFrame 한 개)만큼만 쓰고, 시트가 Excel의
+행 제한(1,048,576행, 헤더 포함)에 닿으면 `<테이블>_2`, `<테이블>_3` … 시트로 이어서 쓴다.
+
+증분 내보내기: 테이블마다 (행 수, 내보내는 순서의 내용 해시)를 bi_export_state에 출력 대상별로 남긴다.
+다음 실행에서 내용이 같으면 시트는 이전 통합 문서의 worksheet XML을 그대로 복사하고 CSV는 건너뛰며,
+앞부분이 같고 뒤에 행만 늘었으면 CSV에는 새 행만 덧붙인다. 해시 계산은 읽기만 하므로 다시 쓰는 것보다 훨씬 싸다.
+출력 쪽도 내용 해시(CSV/Parquet는 파일, Excel은 테이블이 쓰는 시트 XML)를 남겨 두고, 출력이 지워졌거나
+다른 내용으로 바뀌었으면 다시 쓴다 (두 내보내기가 같은 통합 문서에 같은 시트를 써도 재사용은 유지).
+
+Parquet(선택, pyarrow 필요): 테이블당 파일 하나, bi_scores_daily는 run_date=YYYY-MM-DD/ 폴더로 나눈다.
+chunk 하나가 row group 하나이고, 날짜는 date32/timestamp, 금액은 decimal(18,2), 반복되는 범주 문자열은
+dictionary로 써서 Power BI가 타입을 다시 추정하지 않는다. 바뀌지 않은 파일/파티션은 다시 쓰지 않는다.
+
+파생 컬럼(기관규모, 스코어등급)은 sql/bi_views.sql의 뷰가 계산한다: accounts, bi_scores_daily는
+EXPORT_SOURCES의 뷰에서 키 순서로 읽으므로 ODBC로 뷰를 직접 조회한 값과 내보낸 파일이 같다.
+"""
+import os, json, shutil, sqlite3, hashlib, datetime, zipfile
+import xml.etree.ElementTree as ET
+import pandas as pd
+from bi_transform import column_kind
+
+EXCEL_MAX_ROWS = 1048576
+SHEET_NAME_MAX = 31
+DEFAULT_EXPORT_CHUNK = 50000
+EXPORT_VERSION = 2   # 변환/직렬화 방식이 바뀌면 올린다 → 다음 실행은 전체 재작성
+BI_VIEWS_SQL = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "sql", "bi_views.sql"))
+
+# 파생 컬럼이 붙는 테이블: 내보낼 때 읽을 뷰와 정렬 키 (뷰에는 rowid 인덱스가 없어 ORDER BY rowid는 따로 정렬한다)
+EXPORT_SOURCES = {
+    "accounts": ("bi_accounts_v", "account_id"),
+    "bi_scores_daily": ("bi_scores_daily_v", "run_date, account_id"),
+}
+
+XLSX_NS = {"m": "http://schemas.openxmlformats.org/spreadsheetml/2006/main",
+           "r": "http://schemas.openxmlformats.org/officeDocument/2006/relationships",
+           "rel": "http://schemas.openxmlformats.org/package/2006/relationships"}
+
+def ensure_bi_views(con, sql_path=BI_VIEWS_SQL):
+    # 원본 테이블(accounts, bi_scores_daily)이 모두 있을 때만 뷰/식 인덱스를 만든다
+    have = {r[0] for r in con.execute("SELECT name FROM sqlite_master WHERE type = 'table' "
+                                      "AND name IN ('accounts', 'bi_scores_daily')")}
+    if len(have) < 2:
+        return False
+    con.executescript(open(sql_path, "r", encoding="utf-8").read())
+    return True
+
+def export_source(con, table):
+    # (읽을 테이블/뷰, 정렬 키): 파생 컬럼 뷰가 DB에 있으면 뷰, 없으면 원본 테이블을 rowid 순으로
+    source, order = EXPORT_SOURCES.get(table, (table, "rowid"))
+    if source != table and con.execute("SELECT 1 FROM sqlite_master WHERE type = 'view' AND name = ?",
+                                       (source,)).fetchone() is None:
+        return table, "rowid"
+    return source, order
+
+def read_table_chunks(con, table, chunk_size=DEFAULT_EXPORT_CHUNK, offset=0, where="", params=()):
+    # 커서에서 키 순으로 chunk_size 행씩 DataFrame으로 (offset행 이후만, 테이블이 없으면 빈 DataFrame 하나)
+    source, order = export_source(con, table)
+    try:
+        chunks = pd.read_sql_query(f"SELECT * FROM {source} {where} ORDER BY {order} LIMIT -1 OFFSET {int(offset)}",
+                                   con, params=params, chunksize=chunk_size)
+    except (sqlite3.Error, pd.errors.DatabaseError):
+        yield pd.DataFrame()
+        return
+    yield from chunks
+
+def ensure_export_state(con):
+    con.execute("""CREATE TABLE IF NOT EXISTS bi_export_state(
+        target TEXT,
+        table_name TEXT,
+        row_count INTEGER,
+        digest TEXT,
+        sheets TEXT,
+        output_digest TEXT,
+        exported_at TEXT,
+        PRIMARY KEY (target, table_name)
+    )""")
+    # 이전 버전 DB: 파일 크기 대신 출력 내용 해시로 비교
+    if "output_digest" not in {r[1] for r in con.execute("PRAGMA table_info(bi_export_state)")}:
+        con.execute("ALTER TABLE bi_export_state ADD COLUMN output_digest TEXT")
+
+def load_export_state(con, target):
+    ensure_export_state(con)
+    rows = con.execute("SELECT table_name, row_count, digest, sheets, output_digest FROM bi_export_state WHERE target = ?",
+                       (target,)).fetchall()
+    return {t: {"rows": n, "digest": d, "sheets": json.loads(sh) if sh else [], "output_digest": out}
+            for t, n, d, sh, out in rows}
+
+def save_export_state(con, target, table, signature, sheets=None, output_digest=None):
+    ensure_export_state(con)
+    con.execute("INSERT OR REPLACE INTO bi_export_state(target, table_name, row_count, digest, sheets, output_digest, "
+                "exported_at) VALUES (?,?,?,?,?,?,?)",
+                (target, table, signature[0], signature[1],
+                 json.dumps(sheets, ensure_ascii=False) if sheets is not None else None,
+                 output_digest, datetime.datetime.now().isoformat(timespec='seconds')))
+
+def table_signature(con, table, prefix_rows=None, batch_size=DEFAULT_EXPORT_CHUNK, where="", params=()):
+    """내보내는 순서(read_table_chunks와 같은 원본/정렬)의 내용 해시: (행 수, 전체 digest, 앞 prefix_rows행까지의 digest).
+
+    테이블이 없으면 None.
+    """
+    source, order = export_source(con, table)
+    try:
+        cur = con.execute(f"SELECT * FROM {source} {where} ORDER BY {order}", params)
+    except sqlite3.Error:
+        return None
+    # 행마다 구분자를 붙여 해시하므로 fetch 경계와 무관하게 같은 값이 나온다
+    h = hashlib.sha256(f"v{EXPORT_VERSION}".encode())
+    n, prefix = 0, None
+    while True:
+        if n == prefix_rows:
+            prefix = h.hexdigest()
+        size = batch_size if prefix_rows is None or n >= prefix_rows else min(batch_size, prefix_rows - n)
+        rows = cur.fetchmany(size)
+        if not rows:
+            break
+        h.update("".join(repr(r) + "\n" for r in rows).encode())
+        n += len(rows)
+    return n, h.hexdigest(), prefix
+
+def change_kind(prev, signature, output_digest=None):
+    # "same": 이전 내보내기와 내용이 같음, "append": 뒤에 행만 늘었음, "changed": 그 외
+    # (처음 내보내거나 출력 파일/시트가 지워졌거나 다른 곳에서 다른 내용으로 바뀐 경우 포함)
+    # output_digest: 지금 출력(파일 또는 테이블의 시트들)의 내용 해시 → 지난번에 쓴 것과 같아야 재사용
+    if prev is None or signature is None or output_digest is None or output_digest != prev["output_digest"]:
+        return "changed"
+    rows, digest, prefix = signature
+    if rows == prev["rows"] and digest == prev["digest"]:
+        return "same"
+    if rows > prev["rows"] and prefix == prev["digest"]:
+        return "append"
+    return "changed"
+
+def file_digest(path):
+    # 출력 파일 내용의 sha256 (파일이 없으면 None)
+    if not os.path.exists(path):
+        return None
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def sheet_digests(path):
+    # 통합 문서의 시트 이름 → worksheet XML의 sha256 (파일이 없거나 읽을 수 없으면 빈 dict)
+    # 시트 단위라, 같은 파일을 다른 내보내기가 다시 써도 이 테이블의 시트가 같으면 재사용할 수 있다
+    try:
+        with zipfile.ZipFile(path) as z:
+            out = {}
+            for name, part in _sheet_parts(z).items():
+                h = hashlib.sha256()
+                with z.open(part) as f:
+                    for block in iter(lambda: f.read(1 << 20), b""):
+                        h.update(block)
+                out[name] = h.hexdigest()
+            return out
+    except (OSError, KeyError, zipfile.BadZipFile, ET.ParseError):
+        return {}
+
+def sheets_digest(digests, sheets):
+    # 테이블이 쓰는 시트들의 digest를 하나로 (시트가 하나라도 없으면 None)
+    if not sheets or any(name not in digests for name in sheets):
+        return None
+    return hashlib.sha256("".join(digests[name] for name in sheets).encode()).hexdigest()
+
+def sheet_name(table, part):
+    # 첫 시트는 테이블 이름 그대로, 이후는 _2, _3 … (31자 제한 안에서 접미사를 살린다)
+    if part == 1:
+        return table[:SHEET_NAME_MAX]
+    suffix = f"_{part}"
+    return table[:SHEET_NAME_MAX - len(suffix)] + suffix
+
+def _sheet_parts(z):
+    # 시트 이름 → zip 안의 worksheet XML 경로 (xl/workbook.xml + 관계 파일로 찾는다)
+    rels = {r.get("Id"): r.get("Target") for r in
+            ET.fromstring(z.read("xl/_rels/workbook.xml.rels")).findall("rel:Relationship", XLSX_NS)}
+    parts = {}
+    for sheet in ET.fromstring(z.read("xl/workbook.xml")).find("m:sheets", XLSX_NS):
+        target = rels[sheet.get(f"{{{XLSX_NS['r']}}}id")]
+        parts[sheet.get("name")] = target.lstrip("/") if target.startswith("/") else "xl/" + target
+    return parts
+
+def _rows(df):
+    # 결측(NaN/NaT/pd.NA)은 빈 셀, 나머지는 파이썬/NumPy 값 그대로 (Timestamp는 datetime 하위 클래스)
+    values = df.astype(object).where(df.notna(), None)
+    return values.itertuples(index=False, name=None)
+
+class StreamingWorkbook:
+    def __init__(self, path, max_rows=EXCEL_MAX_ROWS):
+        from openpyxl import Workbook
+        self.path = path
+        self.max_rows = max_rows
+        self.wb = Workbook(write_only=True)
+        self.sheets = []
+        self.tables = {}      # 테이블 → 시트 이름 목록
+        self.reused = set()   # 이전 통합 문서에서 XML을 그대로 가져올 시트
+
+    def write_table(self, table, chunks):
+        """chunk(DataFrame) 이터러블을 시트에 이어 쓰고 데이터 행 수를 반환한다."""
+        part, ws, used, header, total = 0, None, 0, None, 0
+        for chunk in chunks:
+            if header is None:
+                header = [str(c) for c in chunk.columns]
+            for row in _rows(chunk):
+                if ws is None or used >= self.max_rows:
+                    part += 1
+                    ws, used = self._new_sheet(table, sheet_name(table, part), header), 1
+                ws.append(row)
+                used += 1
+                total += 1
+        if ws is None:
+            # 빈 테이블도 (컬럼이 있으면 헤더만 있는) 시트를 남긴다
+            self._new_sheet(table, sheet_name(table, 1), header or [])
+        return total
+
+    def reuse_table(self, table, sheets):
+        """내용이 바뀌지 않은 테이블: 빈 시트 자리만 만들고 save()에서 기존 파일의 시트 XML로 바꾼다."""
+        for name in sheets:
+            self._new_sheet(table, name, [])
+            self.reused.add(name)
+
+    def _new_sheet(self, table, name, header):
+        ws = self.wb.create_sheet(title=name)
+        if not self.sheets:
+            # 날짜/일시 서식의 스타일 번호를 항상 같은 순서로 등록해 두어야
+            # 이전 파일에서 복사한 시트 XML의 s="…" 참조가 새 파일에서도 같은 서식을 가리킨다
+            from openpyxl.cell import WriteOnlyCell
+            for v in (datetime.datetime(2000, 1, 1), datetime.date(2000, 1, 1)):
+                WriteOnlyCell(ws, v).style_id
+        self.sheets.append(name)
+        self.tables.setdefault(table, []).append(name)
+        if header:
+            ws.append(header)
+        return ws
+
+    def save(self):
+        if not self.reused:
+            self.wb.save(self.path)
+            return
+        tmp, out_path = self.path + ".tmp", self.path + ".new"
+        self.wb.save(tmp)
+        try:
+            with zipfile.ZipFile(self.path) as old, zipfile.ZipFile(tmp) as new, \
+                 zipfile.ZipFile(out_path, "w", zipfile.ZIP_DEFLATED) as out:
+                old_parts, new_parts = _sheet_parts(old), _sheet_parts(new)
+                swap = {new_parts[name]: old_parts[name] for name in self.reused}
+                for info in new.infolist():
+                    src, part = (old, swap[info.filename]) if info.filename in swap else (new, info.filename)
+                    zinfo = zipfile.ZipInfo(info.filename, info.date_time)
+                    zinfo.compress_type = zipfile.ZIP_DEFLATED
+                    with src.open(part) as r, out.open(zinfo, "w") as w:
+                        shutil.copyfileobj(r, w, 1 << 20)
+        finally:
+            os.remove(tmp)
+        os.replace(out_path, self.path)
+
+PARTITION_COLUMNS = {"bi_scores_daily": "run_date"}
+
+def arrow_type(table, column, declared=None):
+    # 컬럼 종류(bi_transform.RULES)가 있으면 그것으로, 없으면 SQLite 선언 타입으로
+    import pyarrow as pa
+    kind = column_kind(table, column)
+    if kind == "flag":
+        return pa.bool_()
+    if kind == "date":
+        return pa.date32()
+    if kind == "datetime":
+        return pa.timestamp("ms")
+    if kind == "money":
+        return pa.decimal128(18, 2)
+    if kind == "category":
+        return pa.dictionary(pa.int32(), pa.string())
+    declared = (declared or "").upper()
+    if kind == "int" or "INT" in declared:
+        return pa.int64()
+    if kind == "float" or any(t in declared for t in ("REAL", "FLOA", "DOUB", "NUM")):
+        return pa.float64()
+    return pa.string()
+
+def arrow_schema(con, table, columns):
+    import pyarrow as pa
+    declared = {r[1]: r[2] for r in con.execute(f"PRAGMA table_info({table})")}
+    return pa.schema([(str(c), arrow_type(table, str(c), declared.get(c))) for c in columns])
+
+def to_arrow(df, schema):
+    # 정제된 chunk(문자열/숫자/datetime 어느 쪽이든)를 schema 타입의 Arrow 테이블로
+    import pyarrow as pa
+    arrays = []
+    for field in schema:
+        s, t = df[field.name], field.type
+        if pa.types.is_date32(t) or pa.types.is_timestamp(t):
+            if not pd.api.types.is_datetime64_any_dtype(s):
+                s = pd.to_datetime(s, errors="coerce", format="ISO8601")
+            arr = pa.array(s, from_pandas=True).cast(t)
+        elif pa.types.is_decimal(t):
+            arr = pa.array(pd.to_numeric(s, errors="coerce").round(2), type=pa.float64(), from_pandas=True).cast(t)
+        elif pa.types.is_boolean(t) or pa.types.is_int64(t):
+            arr = pa.array(pd.to_numeric(s, errors="coerce").astype("Int64"), from_pandas=True).cast(t)
+        elif pa.types.is_float64(t):
+            arr = pa.array(pd.to_numeric(s, errors="coerce"), type=t, from_pandas=True)
+        elif pa.types.is_dictionary(t) and isinstance(s.dtype, pd.CategoricalDtype):
+            arr = pa.array(s, from_pandas=True).cast(t)
+        else:
+            arr = pa.array(s.where(s.isna(), s.astype(str)), type=pa.string(), from_pandas=True)
+            if pa.types.is_dictionary(t):
+                arr = arr.dictionary_encode()
+        arrays.append(arr)
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+def write_parquet(con, table, path, transform=None, chunk_size=DEFAULT_EXPORT_CHUNK, where="", params=(), drop=()):
+    """table을 chunk마다 row group 하나로 path에 쓴다 (임시 파일 → 교체). 쓴 행 수, 테이블이 없으면 None."""
+    import pyarrow.parquet as pq
+    writer, rows, tmp = None, 0, path + ".tmp"
+    try:
+        for chunk in read_table_chunks(con, table, chunk_size, where=where, params=params):
+            if chunk.columns.empty:
+                return None
+            if transform is not None:
+                chunk = transform(table, chunk)
+            chunk = chunk.drop(columns=list(drop))
+            if writer is None:
+                schema = arrow_schema(con, table, chunk.columns)
+                writer = pq.ParquetWriter(tmp, schema, compression="snappy")
+            if len(chunk):
+                writer.write_table(to_arrow(chunk, schema))
+                rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    os.replace(tmp, path)
+    return rows
+
+def export_parquet(con, out_dir, tables, transform=None, chunk_size=DEFAULT_EXPORT_CHUNK, target=None, incremental=True):
+    """테이블당 <out_dir>/<table>.parquet, PARTITION_COLUMNS 테이블은 <out_dir>/<table>/<col>=<값>/part-0.parquet.
+
+    (다시 쓴 파일 수, 바뀌지 않아 그대로 둔 파일 수)를 반환한다.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    target = target or "parquet:" + os.path.abspath(out_dir)
+    state = load_export_state(con, target) if incremental else {}
+    written = skipped = 0
+    for table in tables:
+        column = PARTITION_COLUMNS.get(table)
+        if column is None:
+            parts = [(table, os.path.join(out_dir, f"{table}.parquet"), "", ())]
+        else:
+            try:
+                values = [r[0] for r in con.execute(f"SELECT DISTINCT {column} FROM {table} ORDER BY 1")]
+            except sqlite3.Error:
+                continue
+            base = os.path.join(out_dir, table)
+            parts = [(f"{table}/{column}={v}", os.path.join(base, f"{column}={v}", "part-0.parquet"),
+                      f"WHERE {column} = ?", (v,)) for v in values]
+            # 보존 기간이 지나 DB에서 빠진 날짜(bi_scores_history로 압축됨)는 폴더도 지운다
+            keep = {f"{column}={v}" for v in values}
+            if os.path.isdir(base):
+                for d in os.listdir(base):
+                    if d.startswith(f"{column}=") and d not in keep:
+                        shutil.rmtree(os.path.join(base, d))
+        for key, path, where, params in parts:
+            prev = state.get(key)
+            sig = table_signature(con, table, prev["rows"] if prev else None, where=where, params=params)
+            if change_kind(prev, sig, file_digest(path)) == "same":
+                skipped += 1
+                continue
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if write_parquet(con, table, path, transform, chunk_size, where, params, drop=[column] if column else []) is None:
+                continue
+            save_export_state(con, target, key, sig, output_digest=file_digest(path))
+            written += 1
+    con.commit()
+    return written, skipped
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Power BI 내보내기용 테이블 정제 규칙 (score.py와 src/utils/powerbi_connector.py가 함께 쓴다).
+
+테이블마다 컬럼 종류만 선언한다(RULES). 구간 파생 컬럼(기관규모, 스코어등급)은 sql/bi_views.sql의
+뷰가 계산해 오므로 여기서는 타입만 맞춘다.
+변환은 모두 컬럼 단위 벡터 연산이고 컬럼마다 한 번씩만 한다 (행별 apply, 재파싱 없음).
+출력 형태(output):
+  - "excel": 날짜 → datetime.date, 일시 → datetime64 (Excel 날짜/일시 서식으로 기록)
+  - "arrow": 날짜/일시 모두 datetime64, 반복 라벨은 category (Parquet date32/timestamp/dictionary)
+  - "text":  날짜/일시를 'YYYY-MM-DD HH:MM:SS' 문자열로 (CSV)
+"""
+import numpy as np
+import pandas as pd
+
+TEXT_DATETIME = '%Y-%m-%d %H:%M:%S'
+
+# 컬럼 종류: date, datetime, int, float, money(금액), flag(0/1), category(반복 라벨)
+_OPPORTUNITIES = {
+    "date": ["expected_close_date"],
+    "datetime": ["created_at", "closed_at"],
+    "money": ["amount_expected"],
+    "category": ["stage", "source"],
+}
+_ORDERS = {"date": ["order_date"], "money": ["total_amount"]}
+RULES = {
+    "accounts": {
+        "datetime": ["created_at", "updated_at"],
+        "int": ["bed_count", "annual_test_volume"],
+        "category": ["account_type", "city", "state_region", "country", "ownership_type", "기관규모"],
+    },
+    "bi_scores_daily": {
+        "date": ["run_date", "t0_date"],
+        "float": ["p_win_90d"],
+        "money": ["expected_amount_180d", "expected_value"],
+        "flag": ["is_priority"],
+        "category": ["스코어등급"],
+    },
+    "interactions": {"datetime": ["occurred_at"], "category": ["channel", "outcome"]},
+    "products": {"flag": ["requires_install"], "money": ["list_price"], "category": ["product_type", "brand"]},
+    "opportunities": _OPPORTUNITIES,
+    "bi_opportunities": _OPPORTUNITIES,
+    "orders": _ORDERS,
+    "bi_orders": _ORDERS,
+}
+
+_KINDS = {table: {col: kind for kind, cols in rules.items() for col in cols} for table, rules in RULES.items()}
+
+def column_kind(table, column):
+    return _KINDS.get(table, {}).get(column)
+
+def _as_datetime(s):
+    # 적재 시 ISO 형식으로 정규화되어 있으므로 형식 추론 없이 파싱 (이미 datetime이면 그대로)
+    return s if pd.api.types.is_datetime64_any_dtype(s) else pd.to_datetime(s, errors='coerce', format='ISO8601')
+
+def _as_numeric(s):
+    # ingest.py가 ddl 타입으로 적재한 컬럼은 이미 숫자 dtype → 재변환 생략
+    return s if pd.api.types.is_numeric_dtype(s) else pd.to_numeric(s, errors='coerce')
+
+def _as_text(s):
+    # TEXT_DATETIME 문자열: dt.strftime(원소마다 파이썬 호출) 대신 NumPy ISO 변환 후 'T'만 공백으로 (NaT → NaN)
+    if not len(s):
+        return s.dt.strftime(TEXT_DATETIME)
+    v = np.datetime_as_string(s.values.astype('datetime64[s]'), unit='s')
+    v.view(np.uint32).reshape(len(v), -1)[:, 10] = ord(' ')
+    return pd.Series(v.astype(object), index=s.index, name=s.name).where(s.notna())
+
+def transform_table(table, df, output="excel"):
+    """규칙이 있는 컬럼만 한 번씩 변환한 새 DataFrame (원본은 그대로)."""
+    kinds = _KINDS.get(table, {})
+    out = df.copy(deep=False)
+    for col in df.columns:
+        kind = kinds.get(col)
+        if kind is None:
+            continue
+        s = df[col]
+        if kind in ("date", "datetime"):
+            s = _as_datetime(s)
+            if output == "text":
+                s = _as_text(s)
+            elif output == "excel" and kind == "date":
+                s = s.dt.date
+        elif kind == "int":
+            s = _as_numeric(s).astype('Int64')
+        elif kind in ("float", "money"):
+            s = _as_numeric(s)
+        elif kind == "flag":
+            s = _as_numeric(s).fillna(0).astype(int)
+        elif kind == "category" and output == "arrow":
+            # Excel/CSV에는 어차피 값으로 쓰므로 category 변환은 Parquet용에서만
+            s = s.astype('category')
+        out[col] = s
+    return out
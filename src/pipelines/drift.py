@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""피처/스코어 분포 드리프트 감시 (PSI).
+
+retrain 때 학습 데이터로 컬럼별 구간(수치: 10분위 경계, 범주: 학습 때의 값)과 비율을
+src/models/drift_baseline.json에 저장한다. score 실행마다 chunk를 흘려보내며 같은 구간의
+개수만 누적하므로(과거 이력을 다시 읽지 않음) 메모리는 컬럼당 구간 수만큼만 쓴다.
+결과는 drift_runs 테이블에 실행일별로 남고, 이 스크립트는 PSI가 임계값 이상인 컬럼이 있으면
+DRIFT_EXIT_CODE로 종료해 스케줄러가 --mode retrain을 실행할 수 있게 한다.
+"""
+import argparse, os, sys, json, sqlite3
+import numpy as np
+
+MODEL_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "models"))
+BASELINE_FILE = "drift_baseline.json"
+DEFAULT_BINS = 10
+DEFAULT_PSI_THRESHOLD = 0.2   # 관례: < 0.1 안정, 0.1~0.2 주의, >= 0.2 재학습 권장
+DRIFT_EXIT_CODE = 10
+SCORE_COLUMN = "p_win_90d"
+EPS = 1e-4                    # 빈 구간의 log(0) 방지
+
+def bin_spec(values, numeric, bins=DEFAULT_BINS):
+    # 수치: 분위수 경계 (중복 제거), 범주: 학습 때 나온 값 목록. 결측/처음 보는 값은 별도 구간
+    if numeric:
+        v = np.asarray(values, dtype=float)
+        v = v[~np.isnan(v)]
+        edges = np.unique(np.quantile(v, np.linspace(0, 1, bins + 1)[1:-1])) if len(v) else np.array([])
+        return {"kind": "num", "edges": edges.tolist()}
+    cats = sorted({str(x) for x in values if x is not None and x == x})
+    return {"kind": "cat", "categories": cats}
+
+def bin_counts(spec, values):
+    if spec["kind"] == "num":
+        v = np.asarray(values, dtype=float)
+        edges = np.asarray(spec["edges"], dtype=float)
+        idx = np.where(np.isnan(v), len(edges) + 1, np.searchsorted(edges, v, side="right"))
+        return np.bincount(idx, minlength=len(edges) + 2)
+    index = {c: i for i, c in enumerate(spec["categories"])}
+    other, missing = len(index), len(index) + 1
+    idx = np.fromiter((missing if x is None or x != x else index.get(str(x), other) for x in values),
+                      dtype=np.int64, count=len(values))
+    return np.bincount(idx, minlength=len(index) + 2)
+
+def psi(expected, actual):
+    e = np.asarray(expected, dtype=float); a = np.asarray(actual, dtype=float)
+    if a.sum() == 0:
+        return 0.0
+    e = np.clip(e / e.sum(), EPS, None); a = np.clip(a / a.sum(), EPS, None)
+    return float(np.sum((a - e) * np.log(a / e)))
+
+def build_baseline(X, num_cols, cat_cols, scores, trained_at=None):
+    baseline = {"trained_at": trained_at, "rows": int(len(X)), "columns": {}}
+    for col in list(num_cols) + list(cat_cols):
+        spec = bin_spec(X[col].values, col in num_cols)
+        spec["expected"] = bin_counts(spec, X[col].values).tolist()
+        baseline["columns"][col] = spec
+    spec = bin_spec(scores, True)
+    spec["expected"] = bin_counts(spec, scores).tolist()
+    baseline["columns"][SCORE_COLUMN] = spec
+    return baseline
+
+def save_baseline(baseline, model_dir=MODEL_DIR):
+    with open(os.path.join(model_dir, BASELINE_FILE), "w", encoding="utf-8") as f:
+        json.dump(baseline, f, ensure_ascii=False, indent=2)
+
+def load_baseline(model_dir=MODEL_DIR):
+    path = os.path.join(model_dir, BASELINE_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+class DriftMonitor:
+    # baseline과 같은 구간으로 이번 실행의 개수를 누적
+    def __init__(self, baseline):
+        self.columns = baseline["columns"]
+        self.counts = {c: np.zeros(len(s["expected"]), dtype=np.int64) for c, s in self.columns.items()}
+
+    def update(self, df):
+        for col, spec in self.columns.items():
+            if col in df:
+                self.counts[col] += bin_counts(spec, np.asarray(df[col]))
+
+    def observe(self, chunks):
+        # chunk를 그대로 넘기면서 분포만 누적 (스코어링 파이프라인에 끼워 넣는 용도)
+        for chunk in chunks:
+            self.update(chunk)
+            yield chunk
+
+    def results(self):
+        return {c: (psi(s["expected"], self.counts[c]), int(self.counts[c].sum())) for c, s in self.columns.items()}
+
+def ensure_drift_table(con):
+    con.execute("""CREATE TABLE IF NOT EXISTS drift_runs(
+        run_date TEXT,
+        feature TEXT,
+        psi REAL,
+        n INTEGER,
+        baseline_trained_at TEXT,
+        PRIMARY KEY (run_date, feature)
+    )""")
+
+def record_drift(con, run_date, monitor, baseline):
+    ensure_drift_table(con)
+    con.executemany("INSERT OR REPLACE INTO drift_runs VALUES (?,?,?,?,?)",
+                    [(run_date, c, v, n, baseline.get("trained_at")) for c, (v, n) in monitor.results().items()])
+    con.commit()
+
+def score_counts(con, monitor, run_date, batch_size=50000):
+    # 이번 실행일의 p_win_90d만 커서로 나눠 읽어 누적 (이월된 계정 포함)
+    cur = con.execute("SELECT p_win_90d FROM bi_scores_daily WHERE run_date = ?", (run_date,))
+    while True:
+        rows = cur.fetchmany(batch_size)
+        if not rows:
+            break
+        monitor.update({SCORE_COLUMN: np.array([r[0] for r in rows], dtype=float)})
+
+def latest_drift(con):
+    ensure_drift_table(con)
+    return con.execute("""SELECT run_date, feature, psi, n FROM drift_runs
+                          WHERE run_date = (SELECT MAX(run_date) FROM drift_runs)
+                          ORDER BY psi DESC""").fetchall()
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--db", required=True)
+    ap.add_argument("--threshold", type=float, default=DEFAULT_PSI_THRESHOLD,
+                    help="PSI at or above which a retrain is requested")
+    args = ap.parse_args()
+
+    con = sqlite3.connect(args.db)
+    rows = latest_drift(con)
+    con.close()
+    if not rows:
+        print("No drift results yet (run --mode retrain, then --mode score).")
+        return 0
+    print(f"Drift (PSI vs training snapshot) for run {rows[0][0]}:")
+    for _, feature, v, n in rows:
+        flag = "  <-- drift" if v >= args.threshold else ""
+        print(f"  {feature:32s} {v:7.4f}  (n={n}){flag}")
+    drifted = [r[1] for r in rows if r[2] >= args.threshold]
+    if drifted:
+        print(f"Retrain recommended: {len(drifted)} column(s) with PSI >= {args.threshold} (exit {DRIFT_EXIT_CODE})")
+        return DRIFT_EXIT_CODE
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
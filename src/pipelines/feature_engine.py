@@ -0,0 +1,246 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import argparse, sqlite3, datetime, time, sys, os, pathlib
+import numpy as np
+import pandas as pd
+
+from features import FEATURE_COLUMNS, ensure_feature_store
+
+# 정렬 키 = 계정코드 * SHIFT + 기준시점 이후 초 → 한 번의 searchsorted로 (계정, 시점) 질의
+SHIFT = np.int64(1 << 40)
+DAY = 86400
+BASE = pd.Timestamp("1899-12-31")  # 날짜가 없는 행(NaT)은 0초 = "항상 알려진 이벤트"로 둔다
+LABEL_COLUMNS = ["y_close_90d", "y_amount_180d"]
+TRANSFORM_SQL = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "sql", "transform.sql"))
+DEFAULT_CHUNK_DAYS = 31
+
+def build_index(acc, sec, **values):
+    """계정·시간순으로 정렬한 이벤트와, 지정 컬럼들의 누적합(prefix sum)."""
+    order = np.lexsort((sec, acc))
+    idx = {"key": acc[order] * SHIFT + sec[order], "sec": sec[order]}
+    for name, v in values.items():
+        idx[name] = np.concatenate([[0.0], np.cumsum(np.asarray(v, dtype='float64')[order])])
+    return idx
+
+def seek(idx, acc, sec):
+    # 계정 acc에서 시각 sec 이전(미만) 이벤트 개수까지의 위치
+    return np.searchsorted(idx["key"], acc * SHIFT + np.clip(sec, 0, SHIFT - 1), side='left')
+
+def window_sum(idx, name, lo, hi):
+    return idx[name][hi] - idx[name][lo]
+
+def recency_days(idx, start, hi, t):
+    # MAX(date)까지의 경과일 (julianday 차이를 INT로 자른 값), 이벤트가 없으면 9999
+    out = np.full(len(t), 9999, dtype='int64')
+    if not len(idx["sec"]):
+        return out
+    last = np.maximum(hi - 1, 0)
+    has = (hi > start) & (idx["sec"][last] > 0)
+    out[has] = np.trunc((t[has] - idx["sec"][last][has]) / DAY).astype('int64')
+    return out
+
+def ratio(num, den):
+    return np.divide(num, den, out=np.zeros(len(num)), where=den > 0)
+
+def sec_sql(col):
+    # SQLite에서 바로 기준시점 이후 초(정수)로 변환 → 문자열 날짜를 파이썬으로 옮겨 파싱하지 않는다
+    return f"COALESCE(CAST(ROUND((julianday({col}) - julianday('{BASE.date()}')) * {DAY}) AS INTEGER), 0)"
+
+def read_arrays(con, sql, codes):
+    """숫자 컬럼만 SELECT해 (계정코드, 나머지 컬럼...) NumPy 배열로 반환. 미등록 계정 행은 제외."""
+    cur = con.execute(sql)
+    n_cols = len(cur.description)
+    rows = cur.fetchall()
+    data = np.array(rows, dtype='float64').reshape(len(rows), n_cols)
+    acc = codes.get_indexer(data[:, 0].astype('int64')) if len(rows) else np.empty(0, dtype='int64')
+    keep = acc >= 0
+    return [acc[keep].astype('int64')] + [data[keep, j] for j in range(1, n_cols)]
+
+def load_events(con):
+    """계정 코드와 테이블별 이벤트 배열을 한 번 읽어 둔다 (t0 개수와 무관)."""
+    accounts = pd.read_sql_query(
+        "SELECT account_id, bed_count, annual_test_volume, account_type, state_region FROM accounts ORDER BY account_id", con)
+    codes = pd.Index(accounts['account_id'])
+
+    o_acc, o_sec, o_amt = read_arrays(con, f"SELECT account_id, {sec_sql('order_date')}, COALESCE(total_amount, 0.0) "
+                                           "FROM orders WHERE account_id IS NOT NULL", codes)
+    i_acc, i_sec, i_demo, i_pos = read_arrays(con, f"SELECT account_id, {sec_sql('occurred_at')}, channel='demo', outcome='positive' "
+                                                   "FROM interactions WHERE account_id IS NOT NULL", codes)
+    b_acc, b_created, b_due, b_has_due = read_arrays(con, f"SELECT account_id, {sec_sql('created_at')}, {sec_sql('bid_due_date')}, "
+                                                          "bid_due_date IS NOT NULL FROM bids WHERE account_id IS NOT NULL", codes)
+    s_acc, s_sec, s_p1 = read_arrays(con, f"SELECT account_id, {sec_sql('opened_at')}, severity='P1' "
+                                          "FROM service_tickets WHERE account_id IS NOT NULL", codes)
+    ib_acc, ib_sec, ib_active = read_arrays(con, f"SELECT account_id, {sec_sql('install_date')}, status='active' "
+                                                 "FROM install_base WHERE account_id IS NOT NULL", codes)
+    o_sec, i_sec, b_created, b_due, s_sec, ib_sec = (a.astype('int64') for a in (o_sec, i_sec, b_created, b_due, s_sec, ib_sec))
+    return {
+        "accounts": accounts,
+        "orders": build_index(o_acc, o_sec, amount=o_amt),
+        "interactions": build_index(i_acc, i_sec, demo=np.nan_to_num(i_demo), pos=np.nan_to_num(i_pos)),
+        "bids": build_index(b_acc, b_created),
+        "bid_due": (b_acc, b_created, b_due, b_has_due.astype(bool)),
+        "tickets": build_index(s_acc, s_sec, p1=np.nan_to_num(s_p1)),
+        "installs": build_index(ib_acc, ib_sec, active=np.nan_to_num(ib_active),
+                                dated=(ib_sec > 0), days=ib_sec / DAY),
+    }
+
+def compute_features(ev, t0_dates, labels=False, as_of=True):
+    """t0_dates 각각에 대해 feature_view와 같은 컬럼을 계산한다 (계정 × t0 행).
+
+    as_of=True(기본): t0 당일까지 발생한 이벤트만 사용하므로 과거 t0에 미래 정보가 섞이지 않는다.
+    as_of=False: feature_view와 동일하게 윈도우 상한 없이 모든 이벤트를 사용한다 (SQL 뷰 대체용).
+    labels=True면 t0 이후 90/180일 주문으로 y_close_90d / y_amount_180d를 붙인다.
+    """
+    accounts = ev["accounts"]
+    n, m = len(accounts), len(t0_dates)
+    t0_sec = ((pd.to_datetime(list(t0_dates)) - BASE) // pd.Timedelta(seconds=1)).to_numpy(dtype='int64')
+    acc = np.repeat(np.arange(n, dtype='int64'), m)
+    t = np.tile(t0_sec, n)
+    asof = t + DAY if as_of else np.full_like(t, SHIFT - 1)
+
+    cols = {}
+    o = ev["orders"]
+    start, hi, lo180 = seek(o, acc, 0), seek(o, acc, asof), seek(o, acc, t - 180 * DAY)
+    cols["orders_cnt_180d"] = hi - lo180
+    cols["monetary_180d"] = window_sum(o, "amount", lo180, hi)
+    cols["order_recency_days"] = recency_days(o, start, hi, t)
+
+    it = ev["interactions"]
+    start, hi = seek(it, acc, 0), seek(it, acc, asof)
+    lo90, lo180 = seek(it, acc, t - 90 * DAY), seek(it, acc, t - 180 * DAY)
+    cols["interactions_90d"] = hi - lo90
+    cols["demo_180d"] = window_sum(it, "demo", lo180, hi).astype('int64')
+    cols["outcome_pos_ratio"] = ratio(window_sum(it, "pos", start, hi), hi - start)
+    cols["last_interact_recency_days"] = recency_days(it, start, hi, t)
+
+    # 입찰 마감 30일 이내: (생성일 ≤ t0) & (t0 ≤ 마감일 ≤ t0+30) 조건이라 t0 청크 단위로 브로드캐스트
+    b_acc, b_created, b_due, b_has_due = ev["bid_due"]
+    active = np.zeros((n, m), dtype='int64')
+    if len(b_acc):
+        mask = (b_has_due[:, None] & (b_due[:, None] >= t0_sec) & (b_due[:, None] <= t0_sec + 30 * DAY))
+        if as_of:
+            mask &= b_created[:, None] < t0_sec + DAY
+        rows, tcols = np.nonzero(mask)
+        active[b_acc[rows], tcols] = 1
+    cols["has_active_bid_due_30d"] = active.ravel()
+    bi = ev["bids"]
+    cols["bids_submitted_90d"] = seek(bi, acc, asof) - seek(bi, acc, t - 90 * DAY)
+
+    tk = ev["tickets"]
+    start, hi = seek(tk, acc, 0), seek(tk, acc, asof)
+    cols["tickets_180d"] = hi - seek(tk, acc, t - 180 * DAY)
+    cols["p1_ratio"] = ratio(window_sum(tk, "p1", start, hi), hi - start)
+
+    ins = ev["installs"]
+    start, hi = seek(ins, acc, 0), seek(ins, acc, asof)
+    cols["install_equipment_count_active"] = window_sum(ins, "active", start, hi).astype('int64')
+    dated = window_sum(ins, "dated", start, hi)
+    cols["avg_equipment_age_years"] = ratio(dated * (t / DAY) - window_sum(ins, "days", start, hi), dated) / 365.25
+
+    out = pd.DataFrame({
+        "account_id": np.repeat(accounts['account_id'].to_numpy(), m),
+        "t0_date": np.tile(np.asarray(pd.to_datetime(list(t0_dates)).strftime('%Y-%m-%d')), n),
+    })
+    for c in ["bed_count", "annual_test_volume", "account_type", "state_region"]:
+        out[c] = np.repeat(accounts[c].to_numpy(), m)
+    for c in FEATURE_COLUMNS[6:]:
+        out[c] = cols[c]
+
+    if labels:
+        # t0 다음 날부터 90/180일 동안의 주문 (미래 구간 = 학습 타깃)
+        lo = seek(o, acc, t + DAY)
+        amt90 = window_sum(o, "amount", lo, seek(o, acc, t + 91 * DAY))
+        out["y_close_90d"] = (amt90 > 0).astype('int64')
+        out["y_amount_180d"] = window_sum(o, "amount", lo, seek(o, acc, t + 181 * DAY))
+    return out
+
+def feature_frame(con, t0=None):
+    """feature_view 대체: t0(기본: SQLite의 date('now'))에서 뷰와 같은 의미(as_of=False)로 계산."""
+    t0 = t0 or con.execute("SELECT date('now')").fetchone()[0]
+    return compute_features(load_events(con), [t0], as_of=False)
+
+def feature_view_at(con, t0, sql_path=TRANSFORM_SQL):
+    # transform.sql의 feature_view 본문을 date('now') 대신 고정 t0로 실행 (뷰는 바꾸지 않는다)
+    sql = pathlib.Path(sql_path).read_text(encoding='utf-8')
+    body = sql.split("CREATE VIEW feature_view AS", 1)[1].strip().rstrip(";")
+    body = body.replace("date('now')", "date(:t0)")
+    return pd.read_sql_query(f"SELECT * FROM ({body}) ORDER BY account_id", con, params={"t0": t0})
+
+def check_parity(con, t0=None, tol=1e-9):
+    """feature_frame()과 feature_view 결과를 비교해 다른 컬럼 목록을 반환 (빈 리스트 = 일치).
+
+    t0를 주면 feature_view(오늘 기준) 대신 transform.sql의 같은 쿼리를 그 날짜로 실행해 비교한다
+    (데이터 범위 밖의 오늘이면 모든 윈도우가 비어 있어 비교가 의미 없다).
+    """
+    ours = feature_frame(con, t0).sort_values('account_id').reset_index(drop=True)
+    if t0 is None:
+        view = pd.read_sql_query("SELECT * FROM feature_view ORDER BY account_id", con)
+    else:
+        view = feature_view_at(con, t0)
+    if len(ours) != len(view) or list(ours.columns) != list(view.columns):
+        return ["<shape>"]
+    diffs = []
+    for c in view.columns:
+        a, b = ours[c], view[c]
+        if pd.api.types.is_numeric_dtype(b) and pd.api.types.is_numeric_dtype(a):
+            same = np.isclose(a.to_numpy(dtype='float64'), b.to_numpy(dtype='float64'), rtol=tol, atol=tol, equal_nan=True).all()
+        else:
+            same = (a.astype(str) == b.astype(str)).all()
+        if not same:
+            diffs.append(c)
+    return diffs
+
+def backfill(con, start, end, step_days=1, chunk_days=DEFAULT_CHUNK_DAYS):
+    """start~end 범위의 t0마다 피처+라벨을 계산해 feature_backfill에 (account_id, t0_date) 키로 저장."""
+    ensure_feature_store(con)
+    ev = load_events(con)
+    t0s = pd.date_range(start, end, freq=f"{step_days}D")
+    cols = FEATURE_COLUMNS + LABEL_COLUMNS
+    sql = f"INSERT OR REPLACE INTO feature_backfill ({', '.join(cols)}) VALUES ({', '.join(['?'] * len(cols))})"
+    n = 0
+    for i in range(0, len(t0s), chunk_days):
+        chunk = t0s[i:i + chunk_days]
+        df = compute_features(ev, chunk, labels=True)
+        con.executemany(sql, df[cols].astype(object).itertuples(index=False, name=None))
+        con.commit()
+        n += len(df)
+        print(f"  {chunk[0].date()} ~ {chunk[-1].date()}: {len(df)} rows")
+    return n
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--db", required=True, help="SQLite DB path")
+    ap.add_argument("--start", help="first t0 date (YYYY-MM-DD), default = --end")
+    ap.add_argument("--end", default=datetime.date.today().isoformat(), help="last t0 date (YYYY-MM-DD)")
+    ap.add_argument("--step-days", type=int, default=1, help="days between t0 snapshots")
+    ap.add_argument("--chunk-days", type=int, default=DEFAULT_CHUNK_DAYS,
+                    help="t0 dates computed per pass (bounds memory: accounts x chunk rows)")
+    ap.add_argument("--check-parity", action="store_true",
+                    help="compare the vectorized engine against feature_view and exit (1 on mismatch)")
+    ap.add_argument("--parity-t0", action="append",
+                    help="with --check-parity: compare at this t0 (repeatable; default: today via feature_view)")
+    args = ap.parse_args()
+
+    con = sqlite3.connect(args.db)
+    if args.check_parity:
+        failed = False
+        for t0 in args.parity_t0 or [None]:
+            began = time.perf_counter()
+            diffs = check_parity(con, t0)
+            label = t0 or "today"
+            if diffs:
+                print(f"Parity FAILED at {label}, columns differ:", ", ".join(diffs))
+                failed = True
+            else:
+                print(f"Parity OK at {label}: vectorized engine matches feature_view ({time.perf_counter() - began:.2f}s)")
+        con.close()
+        if failed:
+            sys.exit(1)
+        return
+    began = time.perf_counter()
+    n = backfill(con, args.start or args.end, args.end, args.step_days, args.chunk_days)
+    print(f"Backfilled {n} rows → feature_backfill ({time.perf_counter() - began:.2f}s)")
+    con.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import argparse, os, sqlite3, pathlib, time
+
+FEATURE_STORE_SQL = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "sql", "feature_store.sql"))
+
+# feature_view와 같은 순서의 컬럼 (score.py가 feature_store를 읽을 때 사용)
+FEATURE_COLUMNS = [
+    "account_id", "t0_date",
+    "bed_count", "annual_test_volume", "account_type", "state_region",
+    "orders_cnt_180d", "monetary_180d", "order_recency_days",
+    "interactions_90d", "demo_180d", "outcome_pos_ratio", "last_interact_recency_days",
+    "has_active_bid_due_30d", "bids_submitted_90d",
+    "tickets_180d", "p1_ratio",
+    "install_equipment_count_active", "avg_equipment_age_years",
+]
+
+# transform.sql의 feature_view와 같은 집계를, refresh 대상 계정(temp.refresh_accounts)에 한해 :t0 기준으로 계산
+REFRESH_SQL = """
+INSERT INTO feature_store
+WITH acc AS (SELECT account_id FROM temp.refresh_accounts),
+orders_agg AS (
+  SELECT account_id,
+         COUNT(*) FILTER (WHERE order_date >= date(:t0, '-180 day')) AS orders_cnt_180d,
+         SUM(total_amount) FILTER (WHERE order_date >= date(:t0, '-180 day')) AS monetary_180d,
+         MAX(order_date) AS last_order_date
+  FROM orders WHERE account_id IN acc
+  GROUP BY account_id
+),
+interact_agg AS (
+  SELECT account_id,
+         COUNT(*) FILTER (WHERE occurred_at >= date(:t0, '-90 day')) AS interactions_90d,
+         COUNT(*) FILTER (WHERE channel='demo' AND occurred_at >= date(:t0, '-180 day')) AS demo_180d,
+         AVG(CASE WHEN outcome='positive' THEN 1.0 ELSE 0.0 END) AS outcome_pos_ratio,
+         MAX(occurred_at) AS last_interact_at
+  FROM interactions WHERE account_id IN acc
+  GROUP BY account_id
+),
+bid_agg AS (
+  SELECT account_id,
+         MAX(CASE WHEN bid_due_date BETWEEN date(:t0) AND date(:t0, '+30 day') THEN 1 ELSE 0 END) AS has_active_bid_due_30d,
+         COUNT(*) FILTER (WHERE created_at >= date(:t0, '-90 day')) AS bids_submitted_90d
+  FROM bids WHERE account_id IN acc
+  GROUP BY account_id
+),
+ticket_agg AS (
+  SELECT account_id,
+         COUNT(*) FILTER (WHERE opened_at >= date(:t0, '-180 day')) AS tickets_180d,
+         AVG(CASE WHEN severity='P1' THEN 1.0 ELSE 0.0 END) AS p1_ratio
+  FROM service_tickets WHERE account_id IN acc
+  GROUP BY account_id
+),
+install_agg AS (
+  SELECT account_id,
+         COUNT(*) FILTER (WHERE status='active') AS install_equipment_count_active,
+         AVG(julianday(install_date)) AS install_date_jd_avg
+  FROM install_base WHERE account_id IN acc
+  GROUP BY account_id
+)
+SELECT a.account_id,
+       :t0 AS t0_date,
+       a.bed_count, a.annual_test_volume, a.account_type, a.state_region,
+       COALESCE(oa.orders_cnt_180d,0),
+       COALESCE(oa.monetary_180d,0.0),
+       COALESCE(CAST(julianday(:t0) - julianday(oa.last_order_date) AS INT),9999),
+       COALESCE(ia.interactions_90d,0),
+       COALESCE(ia.demo_180d,0),
+       COALESCE(ia.outcome_pos_ratio,0.0),
+       COALESCE(CAST(julianday(:t0) - julianday(ia.last_interact_at) AS INT),9999),
+       COALESCE(ba.has_active_bid_due_30d,0),
+       COALESCE(ba.bids_submitted_90d,0),
+       COALESCE(ta.tickets_180d,0),
+       COALESCE(ta.p1_ratio,0.0),
+       COALESCE(ins.install_equipment_count_active,0),
+       COALESCE((julianday(:t0) - ins.install_date_jd_avg)/365.25,0.0),
+       oa.last_order_date, ia.last_interact_at, ins.install_date_jd_avg
+FROM accounts a
+LEFT JOIN orders_agg oa ON oa.account_id = a.account_id
+LEFT JOIN interact_agg ia ON ia.account_id = a.account_id
+LEFT JOIN bid_agg ba ON ba.account_id = a.account_id
+LEFT JOIN ticket_agg ta ON ta.account_id = a.account_id
+LEFT JOIN install_agg ins ON ins.account_id = a.account_id
+WHERE a.account_id IN acc
+"""
+
+# t0가 old→new로 움직일 때 윈도우 경계를 넘는 이벤트가 있는 계정 (:lo/:hi = 두 t0 중 작은/큰 값)
+WINDOW_SHIFT_SQL = """
+INSERT OR IGNORE INTO temp.refresh_accounts
+SELECT account_id FROM orders
+ WHERE order_date >= date(:lo, '-180 day') AND order_date < date(:hi, '-179 day')
+UNION SELECT account_id FROM interactions
+ WHERE (occurred_at >= date(:lo, '-90 day') AND occurred_at < date(:hi, '-89 day'))
+    OR (occurred_at >= date(:lo, '-180 day') AND occurred_at < date(:hi, '-179 day'))
+UNION SELECT account_id FROM bids
+ WHERE (created_at >= date(:lo, '-90 day') AND created_at < date(:hi, '-89 day'))
+    OR bid_due_date BETWEEN date(:lo) AND date(:hi)
+    OR bid_due_date BETWEEN date(:lo, '+30 day') AND date(:hi, '+30 day')
+UNION SELECT account_id FROM service_tickets
+ WHERE opened_at >= date(:lo, '-180 day') AND opened_at < date(:hi, '-179 day')
+"""
+
+# 나머지 계정은 집계 없이 앵커 컬럼으로 recency/장비 연령만 새 t0 기준으로 이동
+SHIFT_T0_SQL = """
+UPDATE feature_store SET
+  t0_date = :t0,
+  order_recency_days = COALESCE(CAST(julianday(:t0) - julianday(last_order_date) AS INT),9999),
+  last_interact_recency_days = COALESCE(CAST(julianday(:t0) - julianday(last_interact_at) AS INT),9999),
+  avg_equipment_age_years = COALESCE((julianday(:t0) - install_date_jd_avg)/365.25,0.0)
+WHERE t0_date IS NOT :t0
+"""
+
+def ensure_feature_store(con, sql_path=FEATURE_STORE_SQL):
+    upgrade_dirty_triggers(con)
+    con.executescript(pathlib.Path(sql_path).read_text(encoding='utf-8'))
+
+def upgrade_dirty_triggers(con, sql_path=FEATURE_STORE_SQL):
+    # 이전 버전 트리거(INSERT OR IGNORE)는 upsert 문 안에서 UNIQUE 오류를 내므로 지우고 새 정의로 다시 만든다
+    old = [name for (name,) in con.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' "
+                                           "AND sql LIKE '%INSERT OR IGNORE INTO feature_dirty%'")]
+    for name in old:
+        con.execute(f'DROP TRIGGER IF EXISTS {name}')
+    if old:
+        con.executescript(pathlib.Path(sql_path).read_text(encoding='utf-8'))
+    return len(old)
+
+def refresh_feature_store(con, t0=None, full=False):
+    """feature_store를 t0 기준으로 갱신하고 다시 계산한 계정 수를 반환한다.
+
+    변경 추적 트리거가 기록한 feature_dirty 계정과, t0 이동으로 윈도우 경계를 넘는
+    이벤트가 있는 계정만 재집계한다. 저장소가 비어 있거나 full=True면 전체 재계산.
+    """
+    ensure_feature_store(con)
+    t0 = t0 or con.execute("SELECT date('now')").fetchone()[0]
+    prev_t0 = con.execute("SELECT MAX(t0_date) FROM feature_store").fetchone()[0]
+    full = full or prev_t0 is None
+
+    con.execute("CREATE TEMP TABLE IF NOT EXISTS refresh_accounts(account_id INTEGER PRIMARY KEY)")
+    con.execute("DELETE FROM temp.refresh_accounts")
+    if full:
+        con.execute("INSERT INTO temp.refresh_accounts SELECT account_id FROM accounts")
+        con.execute("DELETE FROM feature_store")
+    else:
+        con.execute("INSERT OR IGNORE INTO temp.refresh_accounts SELECT account_id FROM feature_dirty")
+        if prev_t0 != t0:
+            lo, hi = sorted([prev_t0, t0])
+            con.execute(WINDOW_SHIFT_SQL, {"lo": lo, "hi": hi})
+        con.execute("DELETE FROM feature_store WHERE account_id IN (SELECT account_id FROM temp.refresh_accounts)")
+        con.execute(SHIFT_T0_SQL, {"t0": t0})
+    con.execute(REFRESH_SQL, {"t0": t0})
+    n = con.execute("SELECT COUNT(*) FROM temp.refresh_accounts WHERE account_id IN (SELECT account_id FROM accounts)").fetchone()[0]
+    con.execute("DELETE FROM feature_dirty")
+    con.commit()
+    return n
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--db", required=True, help="SQLite DB path")
+    ap.add_argument("--full", action="store_true", help="recompute every account instead of only changed ones")
+    args = ap.parse_args()
+
+    con = sqlite3.connect(args.db)
+    start = time.perf_counter()
+    n = refresh_feature_store(con, full=args.full)
+    total = con.execute("SELECT COUNT(*) FROM feature_store").fetchone()[0]
+    print(f"Refreshed feature_store: {n} of {total} accounts recomputed ({time.perf_counter() - start:.2f}s)")
+    con.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,9 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
-import argparse, os, glob, hashlib, sqlite3, csv, sys, pathlib, datetime
+import argparse, os, glob, hashlib, sqlite3, csv, sys, pathlib, datetime, itertools, queue, threading, re, time
+import contextlib, io
+import concurrent.futures
+from features import upgrade_dirty_triggers
 
 def sha256sum(path):
     h = hashlib.sha256()
@@ -15,33 +18,458 @@ def ensure_ingest_log(con):
         table_name TEXT,
         row_count INTEGER,
         sha256 TEXT,
-        loaded_at TEXT
+        loaded_at TEXT,
+        file_size INTEGER,
+        file_mtime REAL
     )""")
+    # 이전 버전 DB: 크기/mtime 사전 검사용 컬럼 추가
+    have = {r[1] for r in con.execute("PRAGMA table_info(ingest_log)")}
+    for col, typ in (("file_size", "INTEGER"), ("file_mtime", "REAL")):
+        if col not in have:
+            con.execute(f"ALTER TABLE ingest_log ADD COLUMN {col} {typ}")
 
-def load_csv(con, table_name, filepath):
-    with open(filepath, 'r', encoding='utf-8') as f:
+MASTER_TABLES = ('accounts', 'products')
+DEFAULT_BATCH_SIZE = 50000
+
+def iter_batches(reader, batch_size, caster=None):
+    # 파일 전체를 메모리에 올리지 않도록 batch_size 행씩 잘라서 넘긴다
+    while True:
+        batch = list(itertools.islice(reader, batch_size))
+        if not batch:
+            return
+        yield [caster(r) for r in batch] if caster else batch
+
+# ---- 타입 적재: ddl.sql에 선언된 타입으로 적재 시점에 한 번만 변환 ----
+
+DDL_SQL = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "sql", "ddl.sql"))
+DATE_COL = re.compile(r'(_date|_at|_end|_until)$')
+
+def load_schema(ddl_sql=DDL_SQL):
+    """ddl.sql을 읽어 {table: {"columns": {col: type}, "create": CREATE문}} 반환."""
+    if not os.path.exists(ddl_sql):
+        return {}
+    sql = pathlib.Path(ddl_sql).read_text(encoding='utf-8')
+    schema = {}
+    for m in re.finditer(r'CREATE\s+TABLE\s+IF\s+NOT\s+EXISTS\s+(\w+)\s*\((.*?)\);', sql, flags=re.I | re.S):
+        columns = {}
+        for line in m.group(2).split(","):
+            parts = line.split()
+            if len(parts) >= 2:
+                columns[parts[0]] = parts[1].upper()
+        schema[m.group(1)] = {"columns": columns, "create": m.group(0)}
+    return schema
+
+def _to_int(v):
+    if v == '':
+        return None
+    try:
+        return int(v)
+    except ValueError:
+        try:
+            f = float(v)
+        except ValueError:
+            return v
+        return int(f) if f.is_integer() else f
+
+def _to_real(v):
+    if v == '':
+        return None
+    try:
+        return float(v)
+    except ValueError:
+        return v
+
+def _to_date(v):
+    # ISO 문자열로 정규화: 날짜만 있으면 YYYY-MM-DD, 시간이 있으면 YYYY-MM-DD HH:MM:SS
+    # 시간대 오프셋(+09:00, Z)이 있는 값은 그대로 둔다: 오프셋을 버리면 날짜가 하루 바뀔 수 있다
+    if v == '':
+        return None
+    try:
+        d = datetime.datetime.fromisoformat(v.strip())
+    except ValueError:
+        return v
+    if d.tzinfo is not None:
+        return v
+    return d.date().isoformat() if len(v.strip()) <= 10 else d.strftime('%Y-%m-%d %H:%M:%S')
+
+def row_caster(table_name, header, schema):
+    """헤더 순서대로 컬럼 변환 함수를 만든다. 변환할 컬럼이 없으면 None."""
+    columns = schema.get(table_name, {}).get("columns", {})
+    convs = []
+    for c in header:
+        typ = columns.get(c)
+        if typ == "INTEGER":
+            convs.append(_to_int)
+        elif typ == "REAL":
+            convs.append(_to_real)
+        elif typ == "TEXT" and DATE_COL.search(c):
+            convs.append(_to_date)
+        else:
+            convs.append(None)
+    if not any(convs):
+        return None
+    def cast(row):
+        return [conv(v) if conv else v for conv, v in zip(convs, row)]
+    return cast
+
+def _stream_insert(con, sql, batches, table_name, before_first=None, changes=None):
+    # changes: 리스트를 넘기면 배치마다 이 문장이 바꾼 행 수(cursor.rowcount, 트리거가 쓴 행 제외)를 추가
+    n = 0
+    for i, batch in enumerate(batches, 1):
+        if i == 1 and before_first is not None:
+            before_first()
+        cur = con.executemany(sql, batch)
+        if changes is not None:
+            changes.append(cur.rowcount)
+        n += len(batch)
+        print(f"    {table_name}: batch {i} ({n} rows)")
+    return n
+
+def primary_key(con, table_name):
+    # ddl.sql에 선언된 PRIMARY KEY 컬럼 (테이블이 ddl 없이 생성됐다면 빈 리스트)
+    info = con.execute(f'PRAGMA table_info({table_name})').fetchall()
+    return [c[1] for c in sorted(info, key=lambda c: c[5]) if c[5] > 0]
+
+def upsert_sql(table_name, header, pk):
+    cols = ",".join([f'"{c}"' for c in header])
+    placeholders = ",".join(["?"]*len(header))
+    keys = ",".join([f'"{c}"' for c in pk])
+    others = [c for c in header if c not in pk]
+    if not others:
+        return f'INSERT INTO {table_name} ({cols}) VALUES ({placeholders}) ON CONFLICT({keys}) DO NOTHING'
+    assignments = ", ".join([f'"{c}"=excluded."{c}"' for c in others])
+    # 값이 실제로 바뀐 행만 갱신 → rowcount가 신규+변경 행 수만 센다
+    changed = " OR ".join([f'{table_name}."{c}" IS NOT excluded."{c}"' for c in others])
+    return (f'INSERT INTO {table_name} ({cols}) VALUES ({placeholders}) '
+            f'ON CONFLICT({keys}) DO UPDATE SET {assignments} WHERE {changed}')
+
+def read_csv_batches(filepath, batch_size, table_name=None, schema=None):
+    with open(filepath, 'r', encoding='utf-8', newline='') as f:
         reader = csv.reader(f)
         header = next(reader)
-        cols = ",".join([f'"{c}"' for c in header])
-        placeholders = ",".join(["?"]*len(header))
+        caster = row_caster(table_name, header, schema) if schema else None
+        yield from iter_batches(reader, batch_size, caster)
+
+def read_csv_header(filepath):
+    with open(filepath, 'r', encoding='utf-8', newline='') as f:
+        return next(csv.reader(f))
+
+def mark_dirty_batches(con, table_name, header, batches):
+    # 변경 추적 트리거를 멈춘 벌크 적재용: 행마다가 아니라 배치마다 한 번, 배치에 나온 계정을 feature_dirty에 기록
+    idx = header.index("account_id")
+    for batch in batches:
+        con.executemany("INSERT OR IGNORE INTO feature_dirty(account_id) VALUES (?)",
+                        [(a,) for a in {r[idx] for r in batch} if a not in (None, '')])
+        yield batch
+
+def write_batches(con, table_name, filepath, header, batches, batch_size=DEFAULT_BATCH_SIZE, upsert=False,
+                  schema=None, mark_dirty=False):
+    # 단일 writer: 파싱된 배치를 받아 SQLite에 쓴다 (batches는 제너레이터/큐 모두 가능)
+    # mark_dirty: 트리거 대신 배치 단위로 feature_dirty 기록 (account_id 컬럼이 있는 테이블만)
+    mark_dirty = mark_dirty and "account_id" in header
+    if mark_dirty:
+        batches = mark_dirty_batches(con, table_name, header, batches)
+    cols = ",".join([f'"{c}"' for c in header])
+    placeholders = ",".join(["?"]*len(header))
+    if schema and table_name in schema:
+        con.execute(schema[table_name]["create"])
+    else:
         con.execute(f'CREATE TABLE IF NOT EXISTS {table_name} ({", ".join([c+" TEXT" for c in header])})')
-        rows = [row for row in reader]
-        if rows:
-            # 테이블별로 다른 중복 처리 전략 사용
-            if table_name in ['accounts', 'products']:
-                # 마스터 테이블: INSERT OR REPLACE 사용
-                try:
-                    con.executemany(f'INSERT OR REPLACE INTO {table_name} ({cols}) VALUES ({placeholders})', rows)
-                except sqlite3.IntegrityError as e:
-                    print(f"경고: {table_name} 테이블에 중복 데이터가 있습니다. 기존 데이터를 업데이트합니다.")
-                    con.execute(f'DELETE FROM {table_name}')
-                    con.executemany(f'INSERT INTO {table_name} ({cols}) VALUES ({placeholders})', rows)
+    if upsert:
+        pk = primary_key(con, table_name)
+        if pk and all(c in header for c in pk):
+            # 키 기준 델타 병합: 신규/변경 행만 쓰고 이전 적재분은 유지
+            changes = []
+            n = _stream_insert(con, upsert_sql(table_name, header, pk), batches, table_name, changes=changes)
+            print(f"  {table_name}: {sum(changes)} new/changed of {n} rows (key: {', '.join(pk)})")
+            return n
+        print(f"경고: {table_name} 테이블에 기본키가 없어 전체 재적재로 처리합니다.")
+    # 테이블별로 다른 중복 처리 전략 사용
+    if table_name in MASTER_TABLES:
+        # 마스터 테이블: INSERT OR REPLACE 사용
+        try:
+            return _stream_insert(con, f'INSERT OR REPLACE INTO {table_name} ({cols}) VALUES ({placeholders})',
+                                  batches, table_name)
+        except sqlite3.IntegrityError as e:
+            print(f"경고: {table_name} 테이블에 중복 데이터가 있습니다. 기존 데이터를 업데이트합니다.")
+            con.execute(f'DELETE FROM {table_name}')
+            batches = read_csv_batches(filepath, batch_size, table_name, schema)
+            if mark_dirty:
+                batches = mark_dirty_batches(con, table_name, header, batches)
+            return _stream_insert(con, f'INSERT INTO {table_name} ({cols}) VALUES ({placeholders})',
+                                  batches, table_name)
+    else:
+        # 트랜잭션 테이블: 기존 데이터 삭제 후 새로 삽입 (첫 배치가 있을 때만 삭제)
+        def reset_table():
+            print(f"  {table_name} 테이블 데이터를 새로 로드합니다...")
+            if mark_dirty:
+                # 지워지는 행의 계정도 다시 집계 대상 (DELETE 트리거가 하던 일을 한 문장으로)
+                con.execute(f'INSERT OR IGNORE INTO feature_dirty(account_id) '
+                            f'SELECT DISTINCT account_id FROM {table_name} WHERE account_id IS NOT NULL')
+            con.execute(f'DELETE FROM {table_name}')
+        return _stream_insert(con, f'INSERT INTO {table_name} ({cols}) VALUES ({placeholders})',
+                              batches, table_name, before_first=reset_table)
+
+def load_csv(con, table_name, filepath, batch_size=DEFAULT_BATCH_SIZE, upsert=False, schema=None):
+    schema = load_schema() if schema is None else schema
+    return write_batches(con, table_name, filepath, read_csv_header(filepath),
+                         read_csv_batches(filepath, batch_size, table_name, schema),
+                         batch_size=batch_size, upsert=upsert, schema=schema)
+
+# ---- 스캔/파싱 단계: 해시는 스레드 풀에서 병렬(hashlib이 GIL을 놓음). 파일마다 읽기 스레드가 CSV를
+#      배치로 잘라 미리 읽어 두고, 타입 변환(행마다 파이썬 함수 호출이라 GIL에 묶임)은 workers > 1이면
+#      프로세스 풀에서 병렬로 한다. SQLite 쓰기는 메인 스레드 하나가 날짜/파일 순서대로 ----
+
+TABLE_MAP = {
+    "accounts": "accounts",
+    "products": "products",
+    "install": "install_base",
+    "opportunities": "opportunities",
+    "orders": "orders",
+    "interactions": "interactions",
+    "bids": "bids",
+    "service": "service_tickets",
+    "web": "web_events"
+}
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+_EOF = object()
+
+def table_for(fp):
+    # crude mapping based on prefix
+    for k, v in TABLE_MAP.items():
+        if os.path.basename(fp).startswith(k):
+            return v
+    return None
+
+def list_landing_files(landing):
+    files = []
+    for day_dir in sorted(glob.glob(os.path.join(landing, "*"))):
+        for fp in sorted(glob.glob(os.path.join(day_dir, "*.csv"))):
+            tname = table_for(fp)
+            if tname:
+                files.append((fp, tname))
+    return files
+
+def check_file(fp, known):
+    # 크기+mtime이 ingest_log와 같으면 해시 계산 생략
+    st = os.stat(fp)
+    prev = known.get(fp)
+    if prev and prev[1] == st.st_size and prev[2] == st.st_mtime:
+        return prev[0], st.st_size, st.st_mtime
+    return sha256sum(fp), st.st_size, st.st_mtime
+
+def _put(q, item, cancel):
+    while not cancel.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+_CAST_SCHEMA = {}
+_CASTERS = {}
+
+def _init_cast_worker(schema):
+    global _CAST_SCHEMA
+    _CAST_SCHEMA = schema
+
+def iter_text_batches(f, batch_size):
+    # 파싱 전 원문을 batch_size줄씩 자른다 (파싱된 행 대신 문자열 하나만 워커로 보내 직렬화 비용을 줄임)
+    # 따옴표 안의 줄바꿈에서 잘리지 않도록 따옴표 수가 짝수가 될 때까지 다음 줄을 붙인다
+    while True:
+        lines = list(itertools.islice(f, batch_size))
+        if not lines:
+            return
+        quotes = sum(line.count('"') for line in lines)
+        while quotes % 2:
+            line = f.readline()
+            if not line:
+                break
+            lines.append(line)
+            quotes += line.count('"')
+        yield "".join(lines)
+
+def _parse_batch(table_name, header, text):
+    # 타입 변환 워커 프로세스: 원문 배치를 CSV 파싱 + 타입 변환 (caster는 (테이블, 헤더)마다 한 번만 만든다)
+    key = (table_name, tuple(header))
+    if key not in _CASTERS:
+        _CASTERS[key] = row_caster(table_name, header, _CAST_SCHEMA)
+    caster = _CASTERS[key]
+    rows = csv.reader(io.StringIO(text, newline=''))
+    return [caster(r) for r in rows] if caster else list(rows)
+
+def parse_into_queue(fp, batch_size, q, cancel, table_name=None, schema=None, cast_pool=None):
+    # 읽기 스레드: CSV를 배치 단위로 파싱(+타입 변환)해 bounded queue에 넣는다 (쓰기와 겹치는 read-ahead)
+    # cast_pool이 있으면 파싱/타입 변환은 프로세스 풀에 맡기고 큐에는 Future를 넣는다 (_take가 결과를 꺼냄)
+    try:
+        with open(fp, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            if not _put(q, header, cancel):
+                return
+            caster = row_caster(table_name, header, schema) if schema else None
+            if cast_pool is not None and caster is not None:
+                batches = (cast_pool.submit(_parse_batch, table_name, header, text)
+                           for text in iter_text_batches(f, batch_size))
             else:
-                # 트랜잭션 테이블: 기존 데이터 삭제 후 새로 삽입
-                print(f"  {table_name} 테이블 데이터를 새로 로드합니다...")
-                con.execute(f'DELETE FROM {table_name}')
-                con.executemany(f'INSERT INTO {table_name} ({cols}) VALUES ({placeholders})', rows)
-        return len(rows)
+                batches = iter_batches(reader, batch_size, caster)
+            for batch in batches:
+                if not _put(q, batch, cancel):
+                    return
+    except BaseException as e:
+        _put(q, e, cancel)
+        return
+    _put(q, _EOF, cancel)
+
+def _take(q):
+    item = q.get()
+    if isinstance(item, concurrent.futures.Future):
+        item = item.result()
+    if isinstance(item, BaseException):
+        raise item
+    return item
+
+def drain_queue(q):
+    while True:
+        item = _take(q)
+        if item is _EOF:
+            return
+        yield item
+
+# ---- 벌크 적재: 세션 PRAGMA, 날짜 단위 트랜잭션, 인덱스 지연 생성 ----
+
+INDEX_SQL = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "sql", "indexes.sql"))
+BULK_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-262144",  # KiB 단위 → 약 256MB
+    "PRAGMA temp_store=MEMORY",
+)
+
+@contextlib.contextmanager
+def timed(phase, timings):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[phase] = timings.get(phase, 0.0) + time.perf_counter() - start
+
+def print_timings(timings):
+    for phase, sec in timings.items():
+        print(f"  [timing] {phase}: {sec:.2f}s")
+
+def index_names(index_sql):
+    sql = pathlib.Path(index_sql).read_text(encoding='utf-8')
+    return re.findall(r'CREATE\s+INDEX\s+IF\s+NOT\s+EXISTS\s+(\w+)', sql, flags=re.I)
+
+def drop_indexes(con, index_sql=INDEX_SQL):
+    for name in index_names(index_sql):
+        con.execute(f'DROP INDEX IF EXISTS {name}')
+    con.commit()
+
+def build_indexes(con, index_sql=INDEX_SQL):
+    con.executescript(pathlib.Path(index_sql).read_text(encoding='utf-8'))
+
+def pause_dirty_triggers(con):
+    """feature_store 변경 추적 트리거(sql/feature_store.sql)를 지우고 다시 만들 CREATE문을 반환.
+
+    행마다 feature_dirty에 쓰는 트리거는 벌크 적재 처리량을 깎으므로, 벌크 세션 동안은 지우고
+    write_batches(mark_dirty=True)가 배치마다 계정을 한 번에 기록한다.
+    """
+    triggers = con.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger' "
+                           "AND name LIKE 'trg\\_%\\_dirty\\_%' ESCAPE '\\'").fetchall()
+    for name, _ in triggers:
+        con.execute(f'DROP TRIGGER IF EXISTS {name}')
+    con.commit()
+    return [sql for _, sql in triggers]
+
+def resume_dirty_triggers(con, trigger_sql):
+    for sql in trigger_sql:
+        con.execute(sql)
+    con.commit()
+
+def begin_bulk(con):
+    # 세션 전 (journal_mode, synchronous)를 돌려주고 end_bulk가 그대로 되돌린다
+    prev = (con.execute("PRAGMA journal_mode").fetchone()[0], con.execute("PRAGMA synchronous").fetchone()[0])
+    con.execute("PRAGMA journal_mode=WAL")
+    for pragma in BULK_PRAGMAS:
+        con.execute(pragma)
+    return prev
+
+def end_bulk(con, prev):
+    con.rollback()  # 정상 종료 시엔 이미 커밋됨; 실패 시 진행 중인 날짜 트랜잭션만 버린다
+    journal_mode, synchronous = prev
+    con.execute(f"PRAGMA journal_mode={journal_mode}")
+    con.execute(f"PRAGMA synchronous={int(synchronous)}")
+
+def ingest_landing(con, landing, batch_size=DEFAULT_BATCH_SIZE, upsert=False, workers=DEFAULT_WORKERS,
+                   bulk=False, index_sql=INDEX_SQL, ddl_sql=DDL_SQL):
+    timings = {}
+    schema = load_schema(ddl_sql)
+    files = list_landing_files(landing)
+    known = {fp: (sha, size, mtime) for fp, sha, size, mtime in
+             con.execute("SELECT file_path, sha256, file_size, file_mtime FROM ingest_log")}
+    if upsert:
+        upgrade_dirty_triggers(con)
+    cancel = threading.Event()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, workers)) as pool, contextlib.ExitStack() as stack:
+        # 1) 해시 단계: 파일별로 병렬 계산, 결과는 원래 순서대로
+        with timed("scan", timings):
+            checks = pool.map(lambda fp: check_file(fp, known), [fp for fp, _ in files])
+            pending = []
+            for (fp, tname), (sha, size, mtime) in zip(files, checks):
+                prev = known.get(fp)
+                if prev and prev[0] == sha:
+                    if (prev[1], prev[2]) != (size, mtime):
+                        con.execute("UPDATE ingest_log SET file_size=?, file_mtime=? WHERE file_path=?", (size, mtime, fp))
+                    continue
+                pending.append((fp, tname, sha, size, mtime))
+            con.commit()
+
+        trigger_sql = []
+        if bulk and pending:
+            prev_pragmas = begin_bulk(con)
+            with timed("index drop", timings):
+                drop_indexes(con, index_sql)
+                trigger_sql = pause_dirty_triggers(con)
+
+        # 2) 파싱 단계: 읽기 스레드가 다음 배치를 미리 읽고 타입 변환은 프로세스 풀에서 병렬로 하는 동안
+        #    메인 스레드가 날짜/파일 순서대로 적재한다 (파일마다 큐 maxsize=2 → 변환 중인 배치 수도 제한)
+        cast_pool = None
+        if workers > 1 and pending:
+            cast_pool = stack.enter_context(concurrent.futures.ProcessPoolExecutor(
+                workers, initializer=_init_cast_worker, initargs=(schema,)))
+        queues = []
+        for fp, tname, *_ in pending:
+            q = queue.Queue(maxsize=2)
+            pool.submit(parse_into_queue, fp, batch_size, q, cancel, tname, schema, cast_pool)
+            queues.append(q)
+        try:
+            day = None
+            for (fp, tname, sha, size, mtime), q in zip(pending, queues):
+                if bulk and day is not None and os.path.dirname(fp) != day:
+                    con.commit()  # 벌크 모드: 랜딩 날짜 폴더 하나가 한 트랜잭션
+                day = os.path.dirname(fp)
+                print("Loading", fp, "→", tname)
+                with timed(f"load {os.path.basename(day)}", timings):
+                    header = _take(q)
+                    n = write_batches(con, tname, fp, header, drain_queue(q), batch_size=batch_size, upsert=upsert,
+                                      schema=schema, mark_dirty=bool(trigger_sql))
+                    con.execute("INSERT OR REPLACE INTO ingest_log(file_path, table_name, row_count, sha256, loaded_at, file_size, file_mtime) VALUES (?,?,?,?,?,?,?)",
+                                (fp, tname, n, sha, datetime.datetime.now(datetime.timezone.utc).isoformat(), size, mtime))
+                    if not bulk:
+                        con.commit()
+            con.commit()
+        finally:
+            cancel.set()
+            if bulk and pending:
+                end_bulk(con, prev_pragmas)
+                resume_dirty_triggers(con, trigger_sql)
+
+    # 일반 모드: IF NOT EXISTS라 이미 있으면 바로 끝남 / 벌크 모드: 적재가 끝난 뒤 한 번에 재생성
+    with timed("index build", timings):
+        build_indexes(con, index_sql)
+    print_timings(timings)
 
 def run_transform(con, sql_path):
     sql = pathlib.Path(sql_path).read_text(encoding='utf-8')
@@ -52,47 +480,30 @@ def main():
     ap.add_argument("--db", required=True, help="SQLite DB path")
     ap.add_argument("--landing", help="landing folder path with dated CSVs")
     ap.add_argument("--transform-sql", help="Run transform.sql to build views")
+    ap.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                    help="rows per executemany batch (bounds memory regardless of file size)")
+    ap.add_argument("--upsert", action="store_true",
+                    help="merge rows by primary key instead of DELETE-then-reload (keeps earlier landing dates)")
+    ap.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                    help="hash landing files in N threads and, if N > 1, type-cast parsed CSV batches in N worker "
+                         "processes, ahead of the single SQLite writer")
+    ap.add_argument("--bulk", action="store_true",
+                    help="bulk-load session: WAL + relaxed sync pragmas, one transaction per landing day, indexes rebuilt after load")
     args = ap.parse_args()
 
     con = sqlite3.connect(args.db)
     ensure_ingest_log(con)
 
     if args.landing:
-        for day_dir in sorted(glob.glob(os.path.join(args.landing, "*"))):
-            for fp in glob.glob(os.path.join(day_dir, "*.csv")):
-                table_prefix = os.path.basename(fp).split("_")[0]
-                table_map = {
-                    "accounts": "accounts",
-                    "products": "products",
-                    "install": "install_base",
-                    "opportunities": "opportunities",
-                    "orders": "orders",
-                    "interactions": "interactions",
-                    "bids": "bids",
-                    "service": "service_tickets",
-                    "web": "web_events"
-                }
-                # crude mapping based on prefix
-                tname = None
-                for k,v in table_map.items():
-                    if os.path.basename(fp).startswith(k):
-                        tname = v
-                        break
-                if not tname:
-                    continue
-                sha = sha256sum(fp)
-                row = con.execute("SELECT 1 FROM ingest_log WHERE file_path=? AND sha256=?", (fp,sha)).fetchone()
-                if row:
-                    continue
-                print("Loading", fp, "→", tname)
-                n = load_csv(con, tname, fp)
-                con.execute("INSERT INTO ingest_log(file_path, table_name, row_count, sha256, loaded_at) VALUES (?,?,?,?,?)",
-                            (fp, tname, n, sha, datetime.datetime.now(datetime.timezone.utc).isoformat()))
-                con.commit()
+        ingest_landing(con, args.landing, batch_size=args.batch_size, upsert=args.upsert, workers=args.workers,
+                       bulk=args.bulk)
 
     if args.transform_sql:
         print("Running transform:", args.transform_sql)
-        run_transform(con, args.transform_sql)
+        timings = {}
+        with timed("transform", timings):
+            run_transform(con, args.transform_sql)
+        print_timings(timings)
 
     con.close()
 
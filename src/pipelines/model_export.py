@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import argparse, os, json, hashlib, datetime
+import numpy as np
+from scoring_model import ScoringModel, MODEL_FILE, MANIFEST_FILE
+from npscorer import NumpyScoringModel, FORMAT
+
+MODEL_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "models"))
+ARRAYS_FILE = "scoring_model.npz"
+
+def model_arrays(model):
+    """ScoringModel에서 NumPy 스코어러에 필요한 파라미터만 꺼낸다 (manifest 일부, 배열 dict).
+
+    지원: num(SimpleImputer median → StandardScaler) + cat(SimpleImputer most_frequent → OneHotEncoder)
+    전처리, 선형 분류기(LogisticRegression) / 선형 회귀 헤드. 그 외(예: XGBoost 헤드)는 ValueError.
+    """
+    if not isinstance(model, ScoringModel):
+        raise ValueError("only the combined scoring_model.joblib artifact can be exported")
+    if not (hasattr(model.clf, "coef_") and hasattr(model.reg, "coef_")):
+        raise ValueError(f"{type(model.clf).__name__}/{type(model.reg).__name__} heads have no linear coefficients")
+    steps = {name: (trans, cols) for name, trans, cols in model.pre.transformers_ if trans != "drop"}
+    num_imp, scaler = steps["num"][0].named_steps["impute"], steps["num"][0].named_steps["scale"]
+    cat_imp, ohe = steps["cat"][0].named_steps["impute"], steps["cat"][0].named_steps["ohe"]
+    if getattr(ohe, "drop_idx_", None) is not None or getattr(ohe, "infrequent_categories_", None):
+        raise ValueError("OneHotEncoder with drop/infrequent categories is not supported")
+
+    # 학습 때 전부 결측이던 컬럼은 SimpleImputer가 출력에서 뺀다
+    num_cols = [c for c, s in zip(steps["num"][1], num_imp.statistics_) if not np.isnan(s)]
+    cat_keep = [i for i, s in enumerate(cat_imp.statistics_) if not (isinstance(s, float) and np.isnan(s))]
+    cat_cols = [steps["cat"][1][i] for i in cat_keep]
+    manifest = {
+        "num_columns": list(num_cols),
+        "cat_columns": list(cat_cols),
+        "cat_fill": {c: cat_imp.statistics_[i] for c, i in zip(cat_cols, cat_keep)},
+        "categories": {c: ohe.categories_[j].tolist() for j, c in enumerate(cat_cols)},
+        "feature_columns": [str(c) for c in model.pre.feature_names_in_],
+        "classifier": type(model.clf).__name__,
+        "regressor": type(model.reg).__name__,
+    }
+    arrays = {
+        "num_fill": num_imp.statistics_[~np.isnan(num_imp.statistics_)].astype(float),
+        "num_mean": scaler.mean_.astype(float),
+        "num_scale": scaler.scale_.astype(float),
+        "clf_coef": model.clf.coef_.ravel().astype(float),
+        "clf_intercept": np.asarray(model.clf.intercept_, dtype=float).ravel()[0],
+        "reg_coef": np.asarray(model.reg.coef_, dtype=float).ravel(),
+        "reg_intercept": np.asarray(model.reg.intercept_, dtype=float).ravel()[0],
+    }
+    return manifest, arrays
+
+def export_model(model, model_dir=MODEL_DIR, X_check=None, trained_at=None, model_version=None, tol=1e-9):
+    # scoring_model.npz + scoring_model.json을 쓰고, X_check가 있으면 sklearn 예측과 차이를 검증해 기록
+    manifest, arrays = model_arrays(model)
+    manifest = {"format": FORMAT, "model_version": model_version, "arrays": ARRAYS_FILE,
+                "trained_at": trained_at or datetime.datetime.now().isoformat(timespec='seconds'), **manifest}
+    if X_check is not None:
+        (p0, a0), (p1, a1) = model.predict(X_check), NumpyScoringModel(manifest, arrays).predict(X_check)
+        diff = float(max(np.max(np.abs(p0 - p1), initial=0.0), np.max(np.abs(a0 - a1), initial=0.0)))
+        if diff > tol:
+            raise ValueError(f"NumPy scorer differs from the sklearn model by {diff:g}")
+        manifest["check"] = {"rows": int(len(X_check)), "max_abs_diff": diff}
+    np.savez(os.path.join(model_dir, ARRAYS_FILE), **arrays)
+    with open(os.path.join(model_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
+
+def remove_export(model_dir=MODEL_DIR):
+    # 내보낼 수 없는 모델로 재학습했을 때 예전 manifest가 먼저 로드되지 않도록 지운다
+    for name in (MANIFEST_FILE, ARRAYS_FILE):
+        path = os.path.join(model_dir, name)
+        if os.path.exists(path):
+            os.remove(path)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--model-dir", default=MODEL_DIR)
+    args = ap.parse_args()
+
+    import joblib
+    path = os.path.join(args.model_dir, MODEL_FILE)
+    with open(path, "rb") as f:
+        version = hashlib.sha256(f.read()).hexdigest()[:16]
+    m = export_model(joblib.load(path), args.model_dir, model_version=version)
+    print(f"Exported {MODEL_FILE} → {MANIFEST_FILE} + {ARRAYS_FILE} "
+          f"({len(m['num_columns'])} numeric, {len(m['cat_columns'])} categorical columns)")
+
+if __name__ == "__main__":
+    main()
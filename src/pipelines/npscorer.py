@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""NumPy만으로 스코어링: model_export.py가 쓴 scoring_model.json + .npz를 읽어
+ScoringModel.predict(ColumnTransformer → LogisticRegression / LinearRegression)와 같은 값을 계산한다.
+
+scikit-learn/joblib을 import하지 않으므로 로드가 빠르고 라이브러리 버전에 묶이지 않는다.
+"""
+import json, os
+import numpy as np
+
+FORMAT = "ivd-scoring-model/1"
+
+class NumpyScoringModel:
+    def __init__(self, manifest, arrays):
+        if manifest.get("format") != FORMAT:
+            raise ValueError(f"unsupported model format: {manifest.get('format')!r}")
+        self.manifest = manifest
+        self.num_columns = manifest["num_columns"]
+        self.cat_columns = manifest["cat_columns"]
+        self.cat_fill = manifest["cat_fill"]
+        # 범주 → one-hot 열 위치 (학습 때 없던 값은 모두 0: handle_unknown="ignore")
+        self.cat_index, offset = [], len(self.num_columns)
+        for c in self.cat_columns:
+            cats = manifest["categories"][c]
+            self.cat_index.append({v: offset + i for i, v in enumerate(cats)})
+            offset += len(cats)
+        self.width = offset
+        for k in ("num_fill", "num_mean", "num_scale", "clf_coef", "clf_intercept", "reg_coef", "reg_intercept"):
+            setattr(self, k, arrays[k])
+
+    @classmethod
+    def load(cls, manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        npz = os.path.join(os.path.dirname(manifest_path), manifest["arrays"])
+        with np.load(npz, allow_pickle=False) as z:
+            arrays = {k: z[k] for k in z.files}
+        return cls(manifest, arrays)
+
+    def transform(self, X):
+        # X: DataFrame 또는 {컬럼: 배열} (학습 때의 컬럼 이름 사용)
+        n = len(X[self.num_columns[0] if self.num_columns else self.cat_columns[0]])
+        out = np.zeros((n, self.width))
+        if self.num_columns:
+            num = np.column_stack([np.asarray(X[c], dtype=float) for c in self.num_columns])
+            num = np.where(np.isnan(num), self.num_fill, num)
+            out[:, :len(self.num_columns)] = (num - self.num_mean) / self.num_scale
+        rows = np.arange(n)
+        for c, index in zip(self.cat_columns, self.cat_index):
+            fill = self.cat_fill[c]
+            # SimpleImputer와 같게 NaN(x != x)만 결측으로 본다
+            pos = np.array([index.get(fill if v != v else v, -1) for v in np.asarray(X[c], dtype=object)], dtype=np.int64)
+            hit = pos >= 0
+            out[rows[hit], pos[hit]] = 1.0
+        return out
+
+    def predict(self, X):
+        # (수주 확률, 예상 금액) — ScoringModel.predict와 같은 반환 형식
+        Xt = self.transform(X)
+        d = Xt @ self.clf_coef + self.clf_intercept
+        return 1.0 / (1.0 + np.exp(-d)), Xt @ self.reg_coef + self.reg_intercept
@@ -1,51 +1,165 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
-import argparse, sqlite3, os, sys, datetime
-import pandas as pd
-import numpy as np
-
-# Try to import ML; fall back to simple rule-based if missing
-ML_AVAILABLE = True
-try:
-    from sklearn.model_selection import train_test_split
-    from sklearn.preprocessing import OneHotEncoder, StandardScaler
-    from sklearn.compose import ColumnTransformer
-    from sklearn.pipeline import Pipeline
-    from sklearn.impute import SimpleImputer
-    from sklearn.linear_model import LogisticRegression, LinearRegression
-    from sklearn.metrics import roc_auc_score
-    import joblib
-except Exception as e:
-    ML_AVAILABLE = False
+import argparse, sqlite3, os, sys, datetime, collections, hashlib, json, time, importlib.util
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from features import FEATURE_COLUMNS, refresh_feature_store
+from scoring_model import ScoringModel, MODEL_FILE, model_files, load_model
+
+# pandas/NumPy와 이를 쓰는 모듈(feature_engine, drift, model_export, bi_export, bi_transform)은 필요한 함수 안에서
+# import한다: --help나 다른 모듈의 import score가 무거운 라이브러리를 읽지 않도록 (src/utils/bench_startup.py가 검사)
+# ML 라이브러리는 설치 여부만 확인하고 (import 비용 없음), 학습/joblib 로드가 필요할 때 함수 안에서 import한다.
+# 없으면 simple rule-based fallback; xgboost가 있으면 histogram XGBoost 후보도 탐색
+ML_AVAILABLE = all(importlib.util.find_spec(m) is not None for m in ("sklearn", "joblib"))
+XGB_AVAILABLE = importlib.util.find_spec("xgboost") is not None
+PARQUET_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
 
 MODEL_DIR = os.path.join(os.path.dirname(__file__), "..", "models")
 MODEL_DIR = os.path.abspath(MODEL_DIR)
 os.makedirs(MODEL_DIR, exist_ok=True)
 
-def fetch_features(con):
-    # read feature_view
-    df = pd.read_sql_query("SELECT * FROM feature_view", con, parse_dates=['t0_date'])
+# 라벨용 주문 집계: SQL에서 계정당 한 행으로 줄여서 가져온다 (주문 원본을 pandas로 읽지 않음)
+# days_ago = floor(t0 - order_date) <= N  ⇔  julianday(t0) - julianday(order_date) < N + 1
+LABEL_SQL = """
+SELECT account_id,
+       COALESCE(SUM(total_amount) FILTER (WHERE julianday(:t0) - julianday(order_date) < 91), 0.0) AS amt90,
+       COALESCE(SUM(total_amount) FILTER (WHERE julianday(:t0) - julianday(order_date) < 181), 0.0) AS amt180
+FROM orders
+GROUP BY account_id
+"""
+
+# --t0 (과거 시점 재현) 라벨: t0 다음 날부터 90/180일 동안의 주문만 (feature_backfill과 같은 (t0, t0+N] 구간).
+# as-of 피처가 보는 과거 구간과 겹치지 않아야 라벨 누수가 없다
+FORWARD_LABEL_SQL = """
+SELECT account_id,
+       COALESCE(SUM(total_amount) FILTER (WHERE date(order_date) <= date(:t0, '+90 days')), 0.0) AS amt90,
+       COALESCE(SUM(total_amount) FILTER (WHERE date(order_date) <= date(:t0, '+180 days')), 0.0) AS amt180
+FROM orders
+WHERE date(order_date) > date(:t0)
+GROUP BY account_id
+"""
+
+def feature_table(con, source="view"):
+    # SQL로 바로 조인할 수 있는 피처 소스면 테이블/뷰 이름, 아니면 None
+    if source == "store":
+        n = refresh_feature_store(con)
+        print(f"feature_store refreshed ({n} accounts recomputed)")
+        return "feature_store"
+    return "feature_view" if source == "view" else None
+
+def read_feature_rows(con, source="vector", t0=None):
+    # pandas 쪽에서 계산하는 피처 소스: "vector" = feature_engine의 벡터화 계산 (뷰와 동일 결과)
+    import pandas as pd
+    from feature_engine import load_events, compute_features, feature_frame
+    if t0 is not None:
+        # 과거 시점 재현: t0 당일까지의 이벤트만으로 피처 계산 (feature_engine)
+        return compute_features(load_events(con), [t0]).assign(t0_date=pd.Timestamp(t0))
+    return feature_frame(con).assign(t0_date=lambda d: pd.to_datetime(d['t0_date']))
+
+def fetch_features(con, source="view", t0=None):
+    # source: "view" = feature_view 직접 조회, "store" = 증분 갱신된 feature_store 테이블,
+    #         "vector" = feature_engine의 벡터화 계산
     # For labels, build a synthetic y_close_90d and y_amount_180d using heuristics on orders/opps
-    # Note: for demo, we'll use orders within 90/180 days relative to now (approximation).
-    t0 = pd.Timestamp(datetime.datetime.utcnow().date())
-    orders = pd.read_sql_query("SELECT account_id, order_date, total_amount FROM orders", con, parse_dates=['order_date'])
-    if not orders.empty:
-        orders['days_ago'] = (t0 - orders['order_date']).dt.days
-        agg90 = orders[orders['days_ago']<=90].groupby('account_id')['total_amount'].sum().rename('amt90')
-        agg180 = orders[orders['days_ago']<=180].groupby('account_id')['total_amount'].sum().rename('amt180')
+    # Note: for demo, we'll use orders within 90/180 days relative to t0 (default: now; approximation).
+    # With --t0 the labels look forward only: orders in (t0, t0+90] / (t0, t0+180] (FORWARD_LABEL_SQL).
+    import pandas as pd
+    label_t0 = (pd.Timestamp(t0) if t0 is not None else pd.Timestamp(datetime.datetime.utcnow().date())).strftime('%Y-%m-%d')
+    table = feature_table(con, source) if t0 is None else None
+    if table:
+        cols = ", ".join(f"f.{c}" for c in FEATURE_COLUMNS)
+        df = pd.read_sql_query(
+            f"WITH labels AS ({LABEL_SQL}) "
+            f"SELECT {cols}, COALESCE(l.amt90, 0.0) AS amt90, COALESCE(l.amt180, 0.0) AS amt180 "
+            f"FROM {table} f LEFT JOIN labels l ON l.account_id = f.account_id",
+            con, params={"t0": label_t0}, parse_dates=['t0_date'])
     else:
-        agg90 = pd.Series(dtype=float); agg180 = pd.Series(dtype=float)
-    df = df.merge(agg90, left_on='account_id', right_index=True, how='left')
-    df = df.merge(agg180, left_on='account_id', right_index=True, how='left')
-    df['amt90'] = df['amt90'].fillna(0.0); df['amt180'] = df['amt180'].fillna(0.0)
+        df = read_feature_rows(con, source, t0)
+        labels = pd.read_sql_query(FORWARD_LABEL_SQL if t0 is not None else LABEL_SQL, con, params={"t0": label_t0})
+        df = df.merge(labels, on='account_id', how='left')
+        df['amt90'] = df['amt90'].fillna(0.0); df['amt180'] = df['amt180'].fillna(0.0)
     df['y_close_90d'] = (df['amt90'] > 0).astype(int)
     df['y_amount_180d'] = df['amt180']
     return df
 
-def train_models(df):
+DEFAULT_CV_FOLDS = 5
+DEFAULT_TIME_BUDGET = 300.0  # seconds; 이 시간이 지나면 새 후보를 띄우지 않는다
+NOT_TRAINED_EXIT = 3  # --mode retrain이 모델을 저장하지 못함 (기존 모델 유지; run_daily_scoring.bat이 확인)
+
+def candidate_grid():
+    grid = [("logreg", {"C": c, "class_weight": w}) for c in (0.01, 0.1, 1.0, 10.0) for w in (None, "balanced")]
+    if XGB_AVAILABLE:
+        grid += [("xgb_hist", {"max_depth": d, "learning_rate": lr, "n_estimators": n})
+                 for d in (3, 5) for lr in (0.05, 0.1) for n in (200, 400)]
+    return grid
+
+def make_classifier(kind, params):
+    if kind == "xgb_hist":
+        from xgboost import XGBClassifier
+        return XGBClassifier(tree_method="hist", eval_metric="logloss", n_jobs=1, random_state=42, **params)
+    from sklearn.linear_model import LogisticRegression
+    return LogisticRegression(max_iter=1000, **params)
+
+def cv_folds(pre, X, y, k):
+    # 폴드마다 ColumnTransformer를 한 번만 fit/transform 해두고 모든 후보가 같은 행렬을 재사용
+    from sklearn.model_selection import StratifiedKFold
+    from sklearn.base import clone
+    folds = []
+    for tr, va in StratifiedKFold(k, shuffle=True, random_state=42).split(X, y):
+        p = clone(pre).fit(X.iloc[tr])
+        folds.append((p.transform(X.iloc[tr]), y.iloc[tr].values, p.transform(X.iloc[va]), y.iloc[va].values))
+    return folds
+
+_CV_FOLDS = []
+
+def _init_cv_worker(folds):
+    global _CV_FOLDS
+    _CV_FOLDS = folds
+
+def _cv_candidate(kind, params):
+    import numpy as np
+    from sklearn.metrics import roc_auc_score
+    start = time.perf_counter()
+    aucs = []
+    for Xtr, ytr, Xva, yva in _CV_FOLDS:
+        model = make_classifier(kind, params).fit(Xtr, ytr)
+        aucs.append(roc_auc_score(yva, model.predict_proba(Xva)[:,1]))
+    return {"model": kind, "params": params, "auc_mean": float(np.mean(aucs)), "auc_std": float(np.std(aucs)),
+            "seconds": round(time.perf_counter() - start, 3)}
+
+def search_classifier(folds, workers=1, time_budget=DEFAULT_TIME_BUDGET):
+    # 후보(모델×하이퍼파라미터)를 워커 프로세스에서 k-fold로 평가; 예산이 지나면 새 후보는 건너뛴다
+    grid = candidate_grid()
+    todo = iter(grid)
+    deadline = time.perf_counter() + time_budget
+    results, pending = [], set()
+    with ProcessPoolExecutor(workers, initializer=_init_cv_worker, initargs=(folds,)) as pool:
+        while True:
+            # 예산이 0이어도 최소 한 후보는 평가
+            while len(pending) < workers and (time.perf_counter() < deadline or not (results or pending)):
+                spec = next(todo, None)
+                if spec is None:
+                    break
+                pending.add(pool.submit(_cv_candidate, *spec))
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for f in done:
+                r = f.result()
+                results.append(r)
+                print(f"  [CV] {r['model']} {r['params']}: AUC {r['auc_mean']:.3f} ± {r['auc_std']:.3f} ({r['seconds']}s)", flush=True)
+    return results, len(grid) - len(results)
+
+def train_models(df, cv=DEFAULT_CV_FOLDS, workers=1, time_budget=DEFAULT_TIME_BUDGET):
     if not ML_AVAILABLE:
         print("ML libraries not available; skipping train.")
-        return None, None
+        return False
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler
+    from sklearn.compose import ColumnTransformer
+    from sklearn.pipeline import Pipeline
+    from sklearn.impute import SimpleImputer
+    from sklearn.linear_model import LinearRegression
+    import numpy as np
+    from model_export import export_model, remove_export
+    from drift import build_baseline, save_baseline
 
     y_cls = df['y_close_90d'].astype(int)
     y_reg = df['y_amount_180d'].astype(float)
@@ -59,40 +173,76 @@ def train_models(df):
         ("cat", Pipeline([("impute", SimpleImputer(strategy="most_frequent")), ("ohe", OneHotEncoder(handle_unknown="ignore"))]), cat_cols)
     ])
 
-    clf = Pipeline([("prep", pre), ("clf", LogisticRegression(max_iter=1000))])
-    reg = Pipeline([("prep", pre), ("reg", LinearRegression())])
-
-    Xtr, Xte, ytr, yte = train_test_split(X, y_cls, test_size=0.25, stratify=y_cls, random_state=42)
-    clf.fit(Xtr, ytr)
-    proba = clf.predict_proba(Xte)[:,1]
-    try:
-        auc = roc_auc_score(yte, proba)
-    except Exception:
-        auc = float('nan')
-    print(f"[Retrain] Validation AUC: {auc:.3f}")
+    # 라벨이 한 클래스뿐이면 어떤 분류기도 학습할 수 없다 (예: t0 기준 90일 내 주문이 하나도 없음)
+    if y_cls.nunique() < 2:
+        print(f"[Retrain] y_close_90d has only one class ({int(y_cls.iloc[0]) if len(y_cls) else 'no rows'}); "
+              "cannot train a classifier. Use --t0 with an as-of date that has orders in the following 90 days.")
+        return False
+
+    # k-fold 교차검증으로 후보 탐색 (소수 클래스 수보다 많은 폴드는 만들 수 없음)
+    start = time.perf_counter()
+    k = min(cv, int(y_cls.value_counts().reindex([0, 1], fill_value=0).min()))
+    if k >= 2:
+        results, skipped = search_classifier(cv_folds(pre, X, y_cls, k), workers, time_budget)
+        best = max(results, key=lambda r: r['auc_mean'])
+        if skipped:
+            print(f"[Retrain] time budget {time_budget:.0f}s reached; {skipped} candidates not evaluated")
+        print(f"[Retrain] Best: {best['model']} {best['params']} — {k}-fold AUC {best['auc_mean']:.3f}")
+    else:
+        print("[Retrain] too few samples per class for cross-validation; using default logistic regression")
+        results, skipped = [], 0
+        best = {"model": "logreg", "params": {}, "auc_mean": float('nan'), "auc_std": float('nan')}
 
-    # Regressor
-    reg.fit(X, y_reg)
+    # 전처리는 한 번만 fit하고 같은 행렬로 두 헤드(수주 확률, 예상 금액)를 학습
+    model = ScoringModel(pre, make_classifier(best['model'], best['params']), LinearRegression()).fit(X, y_cls, y_reg)
 
     import joblib
-    joblib.dump(clf, os.path.join(MODEL_DIR, "lead_model.joblib"))
-    joblib.dump(reg, os.path.join(MODEL_DIR, "amount_model.joblib"))
+    trained_at = datetime.datetime.now().isoformat(timespec='seconds')
+    joblib.dump(model, os.path.join(MODEL_DIR, MODEL_FILE))
+    # 선형 헤드면 NumPy 전용 형식도 함께 저장 (스코어링 시 scikit-learn 없이 로드); 아니면 예전 내보내기 제거
+    try:
+        export_model(model, MODEL_DIR, X_check=X, trained_at=trained_at, model_version=model_version((os.path.join(MODEL_DIR, MODEL_FILE),)))
+        print("Exported NumPy scoring model (scoring_model.json + .npz)")
+    except ValueError as e:
+        remove_export(MODEL_DIR)
+        print(f"NumPy export skipped: {e}")
+    # 드리프트 감시 기준: 학습 데이터의 컬럼별 분포와 in-sample p_win_90d 분포
+    save_baseline(build_baseline(X, num_cols, cat_cols, model.predict(X)[0], trained_at), MODEL_DIR)
+    metrics = {
+        "trained_at": trained_at,
+        "rows": int(len(X)), "positives": int(y_cls.sum()), "cv_folds": k,
+        "best": best, "candidates": sorted(results, key=lambda r: -r['auc_mean']),
+        "skipped_candidates": skipped, "time_budget_seconds": time_budget,
+        "search_seconds": round(time.perf_counter() - start, 3),
+    }
+    with open(os.path.join(MODEL_DIR, "scoring_model_metrics.json"), "w", encoding="utf-8") as f:
+        json.dump(metrics, f, ensure_ascii=False, indent=2)
     print("Saved models to", MODEL_DIR)
-
-def score_today(con, export=False):
-    # Load or fallback
-    model_path = os.path.join(MODEL_DIR, "lead_model.joblib")
-    amount_path = os.path.join(MODEL_DIR, "amount_model.joblib")
-    have_models = os.path.exists(model_path) and os.path.exists(amount_path)
-    df = fetch_features(con)
-    X = df.drop(columns=['y_close_90d','y_amount_180d','t0_date','account_id','amt90','amt180'])
-
-    if ML_AVAILABLE and have_models:
-        import joblib
-        clf = joblib.load(model_path)
-        reg = joblib.load(amount_path)
-        p = clf.predict_proba(X)[:,1]
-        amt = reg.predict(X)
+    return True
+
+def iter_feature_chunks(con, source="view", t0=None, chunk_size=None):
+    # 스코어링용 피처를 chunk_size 행씩 순서대로 넘겨준다 (라벨은 필요 없으므로 계산하지 않음)
+    import pandas as pd
+    table = feature_table(con, source) if t0 is None else None
+    if table:
+        # SQL 소스는 커서에서 chunk 단위로 읽어 전체 결과를 메모리에 올리지 않는다
+        sql = f"SELECT {', '.join(FEATURE_COLUMNS)} FROM {table}"
+        if not chunk_size:
+            yield pd.read_sql_query(sql, con, parse_dates=['t0_date'])
+            return
+        yield from pd.read_sql_query(sql, con, parse_dates=['t0_date'], chunksize=chunk_size)
+        return
+    # vector/--t0 엔진은 배열 연산이라 피처는 한 번에 계산되고, 스코어링/출력만 chunk로 나눈다
+    df = read_feature_rows(con, source, t0)
+    step = chunk_size or max(len(df), 1)
+    for i in range(0, len(df), step):
+        yield df.iloc[i:i + step]
+
+def score_frame(df, model=None, run_date=None):
+    import pandas as pd
+    X = df.drop(columns=['t0_date','account_id'])
+    if model is not None:
+        p, amt = model.predict(X)
     else:
         # Simple heuristic fallback
         p = (0.05 + 0.4*(df['interactions_90d']>3).astype(float) + 0.3*(df['orders_cnt_180d']>0).astype(float)).clip(0,1).values
@@ -103,8 +253,8 @@ def score_today(con, export=False):
     ev = p*margin - contact_cost
     is_priority = (p >= 0.5).astype(int)
 
-    out = pd.DataFrame({
-        "run_date": [datetime.date.today().isoformat()]*len(df),
+    return pd.DataFrame({
+        "run_date": [run_date or datetime.date.today().isoformat()]*len(df),
         "account_id": df['account_id'].values,
         "t0_date": df['t0_date'].dt.date.astype(str).values,
         "p_win_90d": p,
@@ -112,8 +262,211 @@ def score_today(con, export=False):
         "expected_value": ev,
         "is_priority": is_priority
     })
-    out.to_sql("bi_scores_daily", con, if_exists="append", index=False)
-    print(f"Scored {len(out)} accounts → bi_scores_daily")
+
+DEFAULT_SCORE_CHUNK = 10000  # --workers 사용 시 chunk 크기 기본값 (워커에 나눠 줄 단위)
+
+_WORKER_MODEL = None
+
+def _init_worker(model_paths):
+    # 워커 프로세스마다 모델을 한 번만 로드 (가능하면 numpy 배열은 메모리 매핑)
+    global _WORKER_MODEL
+    if model_paths:
+        _WORKER_MODEL = load_model(model_paths, mmap_mode='r')
+
+def _score_chunk(chunk, run_date):
+    return score_frame(chunk, _WORKER_MODEL, run_date=run_date)
+
+def score_parallel(chunks, workers, model_paths, run_date):
+    # chunk를 워커 프로세스에 나눠 스코어링하고, 결과는 입력 순서(계정 순서) 그대로 돌려준다
+    # 동시에 처리 중인 chunk는 workers*2개로 제한해 메모리 사용량을 일정하게 유지
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(model_paths,)) as pool:
+        pending = collections.deque()
+        for chunk in chunks:
+            pending.append(pool.submit(_score_chunk, chunk, run_date))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+SCORE_COLUMNS = ["run_date","account_id","t0_date","p_win_90d","expected_amount_180d","expected_value","is_priority"]
+
+SCORES_SQL = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "sql", "scores.sql"))
+DEFAULT_RETAIN_DAYS = 90
+
+# (run_date, account_id)가 이미 있으면 덮어쓴다: 같은 날 score/export를 다시 돌려도 행이 늘지 않음
+SCORE_CONFLICT_SQL = """ON CONFLICT(run_date, account_id) DO UPDATE SET
+  t0_date=excluded.t0_date, p_win_90d=excluded.p_win_90d, expected_amount_180d=excluded.expected_amount_180d,
+  expected_value=excluded.expected_value, is_priority=excluded.is_priority"""
+
+def ensure_score_tables(con, sql_path=SCORES_SQL):
+    # 이전 버전 DB: 같은 날 중복 행이 있을 수 있으므로 유니크 인덱스를 만들기 전에 마지막 행만 남긴다
+    have = {r[0] for r in con.execute("SELECT name FROM sqlite_master WHERE name IN ('bi_scores_daily','ux_bi_scores_daily_run_account')")}
+    if have == {"bi_scores_daily"}:
+        con.execute("DELETE FROM bi_scores_daily WHERE rowid NOT IN "
+                    "(SELECT MAX(rowid) FROM bi_scores_daily GROUP BY run_date, account_id)")
+    con.executescript(open(sql_path, "r", encoding="utf-8").read())
+    # ODBC로 바로 쓰는 파생 컬럼 뷰 (bi_accounts_v, bi_scores_daily_v, bi_scores_latest_v)
+    from bi_export import ensure_bi_views
+    ensure_bi_views(con)
+
+def write_scores(con, out):
+    con.executemany(f"INSERT INTO bi_scores_daily ({', '.join(SCORE_COLUMNS)}) VALUES (?,?,?,?,?,?,?) {SCORE_CONFLICT_SQL}",
+                    out[SCORE_COLUMNS].astype(object).itertuples(index=False, name=None))
+
+# 보존 기간이 지난 일별 스코어를 계정×월 요약으로 합친다 (이미 있는 월이면 일수 가중으로 병합)
+COMPACT_SQL = """
+INSERT INTO bi_scores_history
+SELECT account_id, substr(run_date, 1, 7), COUNT(*), MIN(run_date), MAX(run_date),
+       AVG(p_win_90d), MAX(p_win_90d), AVG(expected_amount_180d), AVG(expected_value), SUM(is_priority)
+FROM bi_scores_daily
+WHERE run_date < :cutoff AND run_date NOT IN (SELECT run_date FROM score_backfill_dates)
+GROUP BY account_id, substr(run_date, 1, 7)
+ON CONFLICT(account_id, period) DO UPDATE SET
+  avg_p_win_90d = (avg_p_win_90d*days_scored + excluded.avg_p_win_90d*excluded.days_scored) / (days_scored + excluded.days_scored),
+  avg_expected_amount_180d = (avg_expected_amount_180d*days_scored + excluded.avg_expected_amount_180d*excluded.days_scored) / (days_scored + excluded.days_scored),
+  avg_expected_value = (avg_expected_value*days_scored + excluded.avg_expected_value*excluded.days_scored) / (days_scored + excluded.days_scored),
+  max_p_win_90d = MAX(max_p_win_90d, excluded.max_p_win_90d),
+  first_run_date = MIN(first_run_date, excluded.first_run_date),
+  last_run_date = MAX(last_run_date, excluded.last_run_date),
+  priority_days = priority_days + excluded.priority_days,
+  days_scored = days_scored + excluded.days_scored
+"""
+
+def compact_scores(con, retain_days=DEFAULT_RETAIN_DAYS):
+    # 최신 실행일 기준 retain_days일보다 오래된 행을 bi_scores_history로 옮기고 지운 행 수를 반환
+    # (--t0 재현 실행의 날짜(score_backfill_dates)는 일별 행 그대로 둔다)
+    cutoff = con.execute("SELECT date(MAX(run_date), ?) FROM bi_scores_daily", (f"-{int(retain_days)} day",)).fetchone()[0]
+    if cutoff is None:
+        return 0
+    con.execute(COMPACT_SQL, {"cutoff": cutoff})
+    n = con.execute("DELETE FROM bi_scores_daily WHERE run_date < ? "
+                    "AND run_date NOT IN (SELECT run_date FROM score_backfill_dates)", (cutoff,)).rowcount
+    con.commit()
+    return n
+
+def has_scores(con, run_date):
+    return con.execute("SELECT 1 FROM bi_scores_daily WHERE run_date = ? LIMIT 1", (run_date,)).fetchone() is not None
+
+def model_version(model_paths):
+    if not model_paths:
+        return "heuristic"
+    h = hashlib.sha256()
+    for p in model_paths:
+        with open(p, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()[:16]
+
+def feature_fingerprint(df):
+    # 피처 벡터(계정/t0 제외)의 행 단위 64bit 해시
+    # 실수는 소수 6자리로 반올림: --t0 경로(feature_engine)의 윈도우 합은 전체 누적합의 차이라
+    # 다른 계정의 주문이 바뀌면 마지막 비트가 흔들려, 그대로 해시하면 바뀌지 않은 계정까지 재스코어링된다
+    import pandas as pd
+    return pd.util.hash_pandas_object(df.drop(columns=['t0_date','account_id']).round(6), index=False).astype('int64').values
+
+def skip_unchanged(con, chunks, version, run_date, fingerprints):
+    # 지문이 그대로인 계정은 score_cache의 이전 스코어를 bi_scores_daily로 이월하고,
+    # 바뀐 계정만 스코어링 대상으로 넘긴다 (새 지문은 fingerprints에 보관했다가 저장 시 사용)
+    # 이전 지문은 chunk의 계정만 score_cache에서 조회 (전체 계정을 메모리에 올리지 않음)
+    import numpy as np
+    con.execute("CREATE TEMP TABLE IF NOT EXISTS carry_accounts(account_id INTEGER PRIMARY KEY, t0_date TEXT)")
+    stats = {"carried": 0}
+    def gen():
+        for chunk in chunks:
+            fp = feature_fingerprint(chunk)
+            ids = chunk['account_id'].astype(int).tolist()
+            prev = dict(con.execute("SELECT account_id, fingerprint FROM score_cache WHERE model_version = ? "
+                                    "AND account_id IN (SELECT value FROM json_each(?))", (version, json.dumps(ids))))
+            same = np.array([prev.get(a) == f for a, f in zip(ids, fp.tolist())], dtype=bool)
+            if same.any():
+                carry = chunk[same]
+                con.execute("DELETE FROM temp.carry_accounts")
+                con.executemany("INSERT INTO temp.carry_accounts VALUES (?, ?)",
+                                zip(carry['account_id'].astype(int).tolist(), carry['t0_date'].dt.date.astype(str).tolist()))
+                con.execute(f"""INSERT INTO bi_scores_daily ({', '.join(SCORE_COLUMNS)})
+                    SELECT ?, c.account_id, t.t0_date, c.p_win_90d, c.expected_amount_180d, c.expected_value, c.is_priority
+                    FROM temp.carry_accounts t JOIN score_cache c ON c.account_id = t.account_id
+                    WHERE true {SCORE_CONFLICT_SQL}""", (run_date,))
+                stats["carried"] += int(same.sum())
+            if not same.all():
+                fingerprints.update(zip(chunk['account_id'].values[~same].tolist(), fp[~same].tolist()))
+                yield chunk[~same]
+    return gen(), stats
+
+def remember_fingerprints(chunks, fingerprints):
+    # --rescore-all: 전부 스코어링하되 다음 실행을 위해 지문은 갱신
+    for chunk in chunks:
+        fingerprints.update(zip(chunk['account_id'].tolist(), feature_fingerprint(chunk).tolist()))
+        yield chunk
+
+def save_score_cache(con, out, version, fingerprints):
+    con.executemany("""INSERT INTO score_cache VALUES (?,?,?,?,?,?,?)
+        ON CONFLICT(account_id) DO UPDATE SET fingerprint=excluded.fingerprint, model_version=excluded.model_version,
+          p_win_90d=excluded.p_win_90d, expected_amount_180d=excluded.expected_amount_180d,
+          expected_value=excluded.expected_value, is_priority=excluded.is_priority""",
+        [(a, fingerprints.pop(a), version, p, amt, ev, pri) for a, p, amt, ev, pri in zip(
+            out['account_id'].astype(int).tolist(), out['p_win_90d'].astype(float).tolist(),
+            out['expected_amount_180d'].astype(float).tolist(), out['expected_value'].astype(float).tolist(),
+            out['is_priority'].astype(int).tolist())])
+
+def score_run_date(t0=None):
+    # --t0 재현 실행은 그 날짜를 run_date로 쓴다: 오늘 행(bi_scores_latest 등)을 과거 스코어로 덮어쓰지 않음
+    if not t0:
+        return datetime.date.today().isoformat()
+    import pandas as pd
+    return pd.Timestamp(t0).date().isoformat()
+
+def score_today(con, export=False, features="view", t0=None, chunk_size=None, workers=1, rescore_all=False,
+                retain_days=DEFAULT_RETAIN_DAYS):
+    from drift import DriftMonitor, load_baseline, record_drift, score_counts
+    # Load or fallback
+    model_paths = model_files(MODEL_DIR, joblib_ok=ML_AVAILABLE)
+    run_date = score_run_date(t0)
+    if workers > 1:
+        chunk_size = chunk_size or DEFAULT_SCORE_CHUNK
+
+    # 피처 지문 + 모델 버전이 지난 실행과 같은 계정은 스코어를 이월하고 나머지만 스코어링
+    ensure_score_tables(con)
+    if t0:
+        con.execute("INSERT OR IGNORE INTO score_backfill_dates VALUES (?)", (run_date,))
+    version = model_version(model_paths)
+    fingerprints = {}
+    chunks = iter_feature_chunks(con, features, t0, chunk_size)
+    # 학습 스냅샷이 있으면 전체 계정의 피처 분포를 chunk 단위로 누적 (drift.py)
+    baseline = load_baseline(MODEL_DIR) if model_paths else None
+    monitor = DriftMonitor(baseline) if baseline else None
+    if monitor:
+        chunks = monitor.observe(chunks)
+    if rescore_all:
+        chunks, stats = remember_fingerprints(chunks, fingerprints), {"carried": 0}
+    else:
+        chunks, stats = skip_unchanged(con, chunks, version, run_date, fingerprints)
+
+    if workers > 1:
+        scored = score_parallel(chunks, workers, model_paths, run_date)
+    else:
+        model = load_model(model_paths) if model_paths else None
+        scored = (score_frame(chunk, model, run_date) for chunk in chunks)
+
+    # chunk_size가 있으면 chunk마다 스코어링 후 바로 bi_scores_daily에 append (메모리 사용량 일정)
+    total = 0
+    for out in scored:
+        save_score_cache(con, out, version, fingerprints)
+        write_scores(con, out)
+        total += len(out)
+        if chunk_size:
+            print(f"  scored {total} accounts", flush=True)
+    con.commit()
+    print(f"Scored {total} accounts, carried forward {stats['carried']} unchanged → bi_scores_daily")
+    if monitor:
+        score_counts(con, monitor, run_date)
+        record_drift(con, run_date, monitor, baseline)
+        col, (v, _) = max(monitor.results().items(), key=lambda kv: kv[1][0])
+        print(f"Drift: max PSI {v:.3f} ({col}) → drift_runs")
+    if retain_days and not t0:
+        # 보존 기간 정리는 오늘 실행에서만 (과거 날짜 재현 행을 바로 월 요약에 합치지 않음)
+        n = compact_scores(con, retain_days)
+        if n:
+            print(f"Compacted {n} score rows older than {retain_days} days → bi_scores_history")
 
     # Legacy CSV export removed in favor of single Excel export handled separately
     if export:
@@ -127,141 +480,84 @@ def maybe_update_bi_tables(con):
     con.execute("INSERT INTO bi_orders SELECT * FROM orders")
     con.commit()
 
-def _coerce_types_and_compute_columns(tables: dict) -> dict:
-    """Apply Power BI-side cleaning/modeling in Python so PBIX can load directly.
-
-    Expected keys present in tables dict: accounts, bi_scores_daily, opportunities, orders,
-    interactions, products, bi_opportunities, bi_orders
-    """
-    cleaned = dict(tables)
-
-    # accounts: dates, ints, and size bucket (기관규모)
-    if 'accounts' in cleaned:
-        df = cleaned['accounts'].copy()
-        if 'created_at' in df.columns:
-            df['created_at'] = pd.to_datetime(df['created_at'], errors='coerce')
-        if 'updated_at' in df.columns:
-            df['updated_at'] = pd.to_datetime(df['updated_at'], errors='coerce')
-        for col in ['bed_count','annual_test_volume']:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce').astype('Int64')
-        if 'bed_count' in df.columns:
-            def bucket(b):
-                if pd.isna(b):
-                    return np.nan
-                if b >= 200:
-                    return '대형'
-                if b >= 50:
-                    return '중형'
-                return '소형'
-            df['기관규모'] = df['bed_count'].apply(bucket)
-        cleaned['accounts'] = df
-
-    # bi_scores_daily: dates, decimals, score grade (스코어등급)
-    if 'bi_scores_daily' in cleaned:
-        df = cleaned['bi_scores_daily'].copy()
-        for col in ['run_date','t0_date']:
-            if col in df.columns:
-                df[col] = pd.to_datetime(df[col], errors='coerce').dt.date
-        for col in ['p_win_90d','expected_amount_180d','expected_value']:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
-        if 'p_win_90d' in df.columns:
-            def grade(p):
-                if pd.isna(p):
-                    return np.nan
-                if p >= 0.7:
-                    return 'A'
-                if p >= 0.4:
-                    return 'B'
-                return 'C'
-            df['스코어등급'] = df['p_win_90d'].apply(grade)
-        cleaned['bi_scores_daily'] = df
-
-    # orders: date, numeric
-    if 'orders' in cleaned:
-        df = cleaned['orders'].copy()
-        if 'order_date' in df.columns:
-            df['order_date'] = pd.to_datetime(df['order_date'], errors='coerce')
-        if 'total_amount' in df.columns:
-            df['total_amount'] = pd.to_numeric(df['total_amount'], errors='coerce')
-        cleaned['orders'] = df
-
-    # interactions: datetime
-    if 'interactions' in cleaned:
-        df = cleaned['interactions'].copy()
-        if 'occurred_at' in df.columns:
-            df['occurred_at'] = pd.to_datetime(df['occurred_at'], errors='coerce')
-        cleaned['interactions'] = df
-
-    # opportunities: dates, numeric where applicable
-    if 'opportunities' in cleaned:
-        df = cleaned['opportunities'].copy()
-        for col in ['expected_close_date','created_at','closed_at']:
-            if col in df.columns:
-                df[col] = pd.to_datetime(df[col], errors='coerce')
-        if 'amount_expected' in df.columns:
-            df['amount_expected'] = pd.to_numeric(df['amount_expected'], errors='coerce')
-        cleaned['opportunities'] = df
-
-    # products: requires_install to integer/bool-ish, list_price numeric
-    if 'products' in cleaned:
-        df = cleaned['products'].copy()
-        if 'requires_install' in df.columns:
-            df['requires_install'] = pd.to_numeric(df['requires_install'], errors='coerce').fillna(0).astype(int)
-        if 'list_price' in df.columns:
-            df['list_price'] = pd.to_numeric(df['list_price'], errors='coerce')
-        cleaned['products'] = df
-
-    # bi_opportunities, bi_orders: mirror tables can inherit types from base if needed
-    if 'bi_orders' in cleaned and 'orders' in cleaned:
-        # Ensure numeric/date formatting similar to orders
-        df = cleaned['bi_orders'].copy()
-        if 'order_date' in df.columns:
-            df['order_date'] = pd.to_datetime(df['order_date'], errors='coerce')
-        if 'total_amount' in df.columns:
-            df['total_amount'] = pd.to_numeric(df['total_amount'], errors='coerce')
-        cleaned['bi_orders'] = df
-    if 'bi_opportunities' in cleaned and 'opportunities' in cleaned:
-        df = cleaned['bi_opportunities'].copy()
-        for col in ['expected_close_date','created_at','closed_at']:
-            if col in df.columns:
-                df[col] = pd.to_datetime(df[col], errors='coerce')
-        if 'amount_expected' in df.columns:
-            df['amount_expected'] = pd.to_numeric(df['amount_expected'], errors='coerce')
-        cleaned['bi_opportunities'] = df
-
-    return cleaned
-
-def export_powerbi_excel(con, output_path: str):
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+BI_EXPORT_TABLES = [
+    'bi_scores_daily', 'accounts', 'bi_opportunities', 'bi_orders',
+    'interactions', 'opportunities', 'orders', 'products'
+]
 
-    # Pull raw tables from SQLite
-    table_names = [
-        'bi_scores_daily', 'accounts', 'bi_opportunities', 'bi_orders',
-        'interactions', 'opportunities', 'orders', 'products'
-    ]
-    tables = {}
-    for name in table_names:
-        try:
-            tables[name] = pd.read_sql_query(f"SELECT * FROM {name}", con)
-        except Exception:
-            tables[name] = pd.DataFrame()
+def export_powerbi_excel(con, output_path: str, chunk_size=None, incremental=True):
+    from bi_export import (StreamingWorkbook, read_table_chunks, DEFAULT_EXPORT_CHUNK, load_export_state,
+                           save_export_state, table_signature, change_kind, sheet_digests, sheets_digest)
+    from bi_transform import transform_table
+    chunk_size = chunk_size or DEFAULT_EXPORT_CHUNK
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
 
-    # Apply cleaning/modeling
-    tables = _coerce_types_and_compute_columns(tables)
+    table_names = BI_EXPORT_TABLES
+    # 지난 내보내기 이후 내용이 같은 테이블은 기존 통합 문서의 시트를 그대로 복사 (bi_export_state)
+    target = "score.py:" + os.path.abspath(output_path)
+    state = load_export_state(con, target) if incremental else {}
+    digests = sheet_digests(output_path)
 
-    # Write to a single Excel with 8 sheets
-    with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-        for name in table_names:
-            tables[name].to_excel(writer, sheet_name=name, index=False)
-    print(f"Exported Excel with {len(table_names)} sheets → {output_path}")
+    # 나머지는 chunk_size 행씩 읽어 정제 후 바로 시트에 append (통합 문서 전체를 메모리에 두지 않음)
+    book = StreamingWorkbook(output_path)
+    signatures, reused = {}, []
+    for name in table_names:
+        prev = state.get(name)
+        signatures[name] = table_signature(con, name, prev["rows"] if prev else None)
+        if prev and change_kind(prev, signatures[name], sheets_digest(digests, prev["sheets"])) == "same":
+            book.reuse_table(name, prev["sheets"])
+            reused.append(name)
+            continue
+        book.write_table(name, (transform_table(name, chunk) for chunk in read_table_chunks(con, name, chunk_size)))
+    book.save()
+
+    digests = sheet_digests(output_path)
+    for name, sig in signatures.items():
+        if sig is not None:
+            save_export_state(con, target, name, sig, book.tables[name], sheets_digest(digests, book.tables[name]))
+    con.commit()
+    print(f"Exported Excel with {len(book.sheets)} sheets → {output_path} "
+          f"(tables rewritten: {len(table_names) - len(reused)}, unchanged: {len(reused)})")
+
+def export_powerbi_parquet(con, output_dir: str, chunk_size=None, incremental=True):
+    # 테이블당 Parquet 파일 (bi_scores_daily는 run_date별 폴더), chunk마다 row group 하나
+    from bi_export import DEFAULT_EXPORT_CHUNK, export_parquet
+    from bi_transform import transform_table
+    chunk_size = chunk_size or DEFAULT_EXPORT_CHUNK
+    written, skipped = export_parquet(con, output_dir, BI_EXPORT_TABLES,
+                                      lambda name, chunk: transform_table(name, chunk, "arrow"), chunk_size,
+                                      target="score.py:" + os.path.abspath(output_dir), incremental=incremental)
+    print(f"Exported Parquet → {output_dir} (files rewritten: {written}, unchanged: {skipped})")
 
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--db", required=True)
     ap.add_argument("--mode", choices=["retrain","score","export"], default="score")
+    ap.add_argument("--features", choices=["view","store","vector"], default="view",
+                    help="feature source: feature_view (recomputed per query), incrementally refreshed feature_store, "
+                         "or the vectorized NumPy engine (same results as feature_view)")
+    ap.add_argument("--t0", help="point-in-time date (YYYY-MM-DD) to rebuild features/labels as of, e.g. to reproduce a past run; "
+                         "scores are written under run_date = t0, never over today's rows")
+    ap.add_argument("--chunk-size", type=int, default=None,
+                    help="score N accounts at a time and append each chunk to bi_scores_daily (default: all at once)")
+    ap.add_argument("--workers", type=int, default=1,
+                    help="score chunks (or, with --mode retrain, evaluate model candidates) in N worker processes")
+    ap.add_argument("--cv-folds", type=int, default=DEFAULT_CV_FOLDS, help="retrain: k for k-fold model search")
+    ap.add_argument("--time-budget", type=float, default=DEFAULT_TIME_BUDGET,
+                    help="retrain: seconds after which no new candidates are started")
+    ap.add_argument("--rescore-all", action="store_true",
+                    help="score every account even if its features and the model are unchanged since the last run")
+    ap.add_argument("--retain-days", type=int, default=DEFAULT_RETAIN_DAYS,
+                    help="keep daily scores for N days, then roll them into monthly bi_scores_history (0 = keep all)")
+    ap.add_argument("--export-chunk-size", type=int, default=None,
+                    help="export: rows read from SQLite and appended to the workbook at a time (default: 50000)")
+    ap.add_argument("--export-format", choices=["xlsx","parquet"], default="xlsx",
+                    help="export: one Excel workbook, or typed Parquet files (one per table; needs pyarrow)")
+    ap.add_argument("--full-export", action="store_true",
+                    help="export: rewrite every sheet/file even if its table is unchanged since the last export")
     args = ap.parse_args()
+    if args.mode == "export" and args.export_format == "parquet" and not PARQUET_AVAILABLE:
+        ap.error("--export-format parquet needs pyarrow (pip install pyarrow)")
 
     con = sqlite3.connect(args.db)
     # Ensure feature view exists
@@ -272,20 +568,35 @@ def main():
         sql = open("sql/transform.sql", "r", encoding="utf-8").read()
         con.executescript(sql)
 
+    score_args = dict(features=args.features, t0=args.t0, chunk_size=args.chunk_size, workers=args.workers,
+                      rescore_all=args.rescore_all, retain_days=args.retain_days)
     if args.mode == "retrain":
-        df = fetch_features(con)
-        train_models(df)
+        df = fetch_features(con, args.features, args.t0)
+        trained = train_models(df, cv=args.cv_folds, workers=args.workers, time_budget=args.time_budget)
         maybe_update_bi_tables(con)
+        if not trained:
+            con.close()
+            print(f"[Retrain] no model saved; keeping the existing model (exit {NOT_TRAINED_EXIT})")
+            return NOT_TRAINED_EXIT
     elif args.mode == "score":
-        score_today(con, export=False)
+        score_today(con, export=False, **score_args)
         maybe_update_bi_tables(con)
     elif args.mode == "export":
-        # Ensure latest scores exist, then export a single Excel workbook for Power BI
-        score_today(con, export=False)
+        # Ensure latest scores exist, then export a single Excel workbook (or Parquet files) for Power BI
+        # (score 모드가 오늘(--t0이면 그 날짜) 이미 돌았으면 다시 스코어링하지 않는다)
+        ensure_score_tables(con)
+        if not has_scores(con, score_run_date(args.t0)):
+            score_today(con, export=False, **score_args)
         maybe_update_bi_tables(con)
-        export_powerbi_excel(con, os.path.join("powerbi_data", "ivd_powerbi_data.xlsx"))
+        if args.export_format == "parquet":
+            export_powerbi_parquet(con, os.path.join("powerbi_data", "parquet"), args.export_chunk_size,
+                                   incremental=not args.full_export)
+        else:
+            export_powerbi_excel(con, os.path.join("powerbi_data", "ivd_powerbi_data.xlsx"), args.export_chunk_size,
+                                 incremental=not args.full_export)
 
     con.close()
+    return 0
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
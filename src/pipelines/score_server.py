@@ -0,0 +1,244 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""로컬 스코어링 서버: 모델과 피처 테이블을 메모리에 올려 두고 계정 단위 스코어를 바로 돌려준다.
+
+  GET  /score?account_id=12&account_id=34
+  POST /score   {"account_ids": [12, 34]}
+  GET  /stats   요청 수, 배치 수, p50/p99 지연(ms), 모델/피처 로드 시각
+
+모델은 joblib 파일이 바뀔 때만, 피처는 다른 연결이 DB에 커밋했거나 날짜가 바뀔 때만 다시 읽는다.
+동시에 들어온 요청은 짧게 모아서(micro-batch) 한 번의 predict로 처리한다.
+"""
+import argparse, os, json, socket, socketserver, sqlite3, threading, queue, time, collections, datetime
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import urlparse, parse_qs
+import numpy as np
+import pandas as pd
+from score import MODEL_DIR, ML_AVAILABLE, iter_feature_chunks, score_frame
+from scoring_model import model_files, load_model
+
+def model_backend(paths):
+    # load_model과 같은 기준: JSON 매니페스트면 NumPy 전용 모델, 아니면 joblib
+    return "numpy manifest" if paths[0].endswith(".json") else "joblib"
+
+class ModelCache:
+    # 모델 파일의 mtime이 바뀔 때만 다시 로드 (파일이 없으면 score_today와 같은 휴리스틱 fallback)
+    def __init__(self, model_dir=MODEL_DIR):
+        self.model_dir = model_dir
+        self.key = ()
+        self.model = None
+        self.loaded_at = None
+
+    def get(self):
+        paths = model_files(self.model_dir, joblib_ok=ML_AVAILABLE)
+        try:
+            key = tuple((p, os.stat(p).st_mtime_ns) for p in paths) if paths else None
+        except FileNotFoundError:
+            key = None
+        if key != self.key:
+            self.model = load_model(paths) if key else None
+            self.key = key
+            self.loaded_at = datetime.datetime.now().isoformat(timespec='seconds')
+            print(f"Loaded model ({model_backend(paths) if self.model is not None else 'heuristic fallback'})", flush=True)
+        return self.model
+
+class FeatureCache:
+    # 피처 테이블 전체를 account_id 인덱스로 보관; PRAGMA data_version(다른 연결의 커밋) 또는 날짜가 바뀌면 다시 읽는다
+    def __init__(self, db, source="store"):
+        self.con = sqlite3.connect(db, check_same_thread=False)
+        self.source = source
+        self.key = None
+        self.frame = None
+        self.loaded_at = None
+
+    def get(self):
+        key = (self.con.execute("PRAGMA data_version").fetchone()[0], datetime.date.today())
+        if key != self.key:
+            frame = pd.concat(iter_feature_chunks(self.con, self.source), ignore_index=True)
+            frame.index = frame['account_id'].values
+            self.frame, self.key = frame, key
+            self.loaded_at = datetime.datetime.now().isoformat(timespec='seconds')
+            print(f"Loaded {len(frame)} feature rows from {self.source}", flush=True)
+        return self.frame
+
+class MicroBatcher:
+    # 요청을 큐에 모았다가 max_batch개가 차거나 max_wait_ms가 지나면 한 번에 스코어링
+    def __init__(self, models, features, max_batch=256, max_wait_ms=5.0):
+        self.models, self.features = models, features
+        self.max_batch, self.max_wait = max_batch, max_wait_ms / 1000.0
+        self.q = queue.Queue()
+        self.batches = 0
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def submit(self, account_ids):
+        fut = Future()
+        self.q.put((account_ids, fut))
+        return fut
+
+    def _run(self):
+        while True:
+            batch = [self.q.get()]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self.q.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            try:
+                self._score(batch)
+            except Exception as e:
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+
+    def _score(self, batch):
+        frame = self.features.get()
+        model = self.models.get()
+        wanted = list(dict.fromkeys(a for ids, _ in batch for a in ids if a in frame.index))
+        scored = {}
+        if wanted:
+            for rec in score_frame(frame.loc[wanted], model).to_dict('records'):
+                scored[rec['account_id']] = rec
+        self.batches += 1
+        for ids, fut in batch:
+            fut.set_result([scored.get(a, {"account_id": a, "error": "unknown account"}) for a in ids])
+
+class Stats:
+    def __init__(self, window=10000):
+        self.latencies = collections.deque(maxlen=window)  # 최근 요청의 지연(ms)
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def record(self, ms):
+        with self.lock:
+            self.latencies.append(ms)
+            self.requests += 1
+
+    def snapshot(self):
+        with self.lock:
+            lat = np.array(self.latencies, dtype=float)
+            n = self.requests
+        p50, p99 = (np.percentile(lat, [50, 99]).round(3).tolist() if len(lat) else (None, None))
+        return {"requests": n, "p50_ms": p50, "p99_ms": p99}
+
+class ScoreHandler(BaseHTTPRequestHandler):
+    server_version = "ivd-score/1.0"
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/score":
+            self._score(parse_qs(url.query).get("account_id", []))
+        elif url.path == "/stats":
+            app = self.server.app
+            self._send(200, {**app["stats"].snapshot(), "batches": app["batcher"].batches,
+                             "models_loaded_at": app["models"].loaded_at,
+                             "features_loaded_at": app["features"].loaded_at})
+        else:
+            self._send(404, {"error": "not found"})
+
+    def do_POST(self):
+        if urlparse(self.path).path != "/score":
+            self._send(404, {"error": "not found"})
+            return
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        except ValueError:
+            self._send(400, {"error": "invalid JSON body"})
+            return
+        if not isinstance(body, dict):
+            self._send(400, {"error": "body must be a JSON object"})
+            return
+        self._score(body.get("account_ids", []))
+
+    def _score(self, raw_ids):
+        start = time.perf_counter()
+        if not isinstance(raw_ids, list):
+            self._send(400, {"error": "account_ids must be a list"})
+            return
+        try:
+            ids = [int(a) for a in raw_ids]
+        except (TypeError, ValueError):
+            self._send(400, {"error": "account_id must be an integer"})
+            return
+        if not ids:
+            self._send(400, {"error": "no account_id given"})
+            return
+        try:
+            scores = self.server.app["batcher"].submit(ids).result()
+        except Exception as e:
+            self._send(500, {"error": str(e)})
+            return
+        self._send(200, {"scores": scores})
+        self.server.app["stats"].record((time.perf_counter() - start) * 1000.0)
+
+    def _send(self, code, obj):
+        data = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def address_string(self):
+        # Unix 소켓 연결은 client_address가 비어 있다
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+class ThreadingHTTPServer(socketserver.ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+class ThreadingUnixHTTPServer(ThreadingHTTPServer):
+    address_family = socket.AF_UNIX
+
+    def server_bind(self):
+        # HTTPServer.server_bind는 (host, port) 주소를 가정하므로 소켓만 바인딩
+        socketserver.TCPServer.server_bind(self)
+        self.server_name, self.server_port = "localhost", 0
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--db", required=True)
+    ap.add_argument("--features", choices=["view","store","vector"], default="store",
+                    help="feature source kept in memory (same choices as score.py)")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--socket", help="listen on this Unix socket path instead of host:port")
+    ap.add_argument("--max-batch", type=int, default=256, help="max requests scored together")
+    ap.add_argument("--max-wait-ms", type=float, default=5.0, help="how long to wait for more requests before scoring a batch")
+    ap.add_argument("--verbose", action="store_true", help="log every request")
+    args = ap.parse_args()
+
+    models = ModelCache()
+    features = FeatureCache(args.db, args.features)
+    models.get(); features.get()  # 첫 요청 전에 미리 로드
+    app = {"models": models, "features": features, "stats": Stats(),
+           "batcher": MicroBatcher(models, features, args.max_batch, args.max_wait_ms)}
+
+    if args.socket:
+        if os.path.exists(args.socket):
+            os.unlink(args.socket)
+        server = ThreadingUnixHTTPServer(args.socket, ScoreHandler)
+        where = args.socket
+    else:
+        server = ThreadingHTTPServer((args.host, args.port), ScoreHandler)
+        where = f"http://{args.host}:{args.port}"
+    server.app, server.verbose = app, args.verbose
+    print(f"Scoring server listening on {where}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if args.socket and os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+if __name__ == "__main__":
+    main()
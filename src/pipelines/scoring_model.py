@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""스코어링 모델 묶음: 전처리(ColumnTransformer)를 한 번만 적용하고 같은 행렬을 두 헤드에 넘긴다.
+
+  - clf: 90일 내 수주 확률 (predict_proba[:,1])
+  - reg: 180일 예상 금액 (predict)
+
+retrain은 src/models/scoring_model.joblib 하나로 저장하고, 선형 헤드면 NumPy 전용 형식
+(scoring_model.json + .npz, model_export.py)도 함께 쓴다. 로드 우선순위는 NumPy 형식 → joblib →
+예전 형식(lead_model.joblib + amount_model.joblib, 각자 전처리를 포함한 Pipeline).
+"""
+import os
+
+MODEL_FILE = "scoring_model.joblib"
+MANIFEST_FILE = "scoring_model.json"
+LEGACY_FILES = ("lead_model.joblib", "amount_model.joblib")
+
+class ScoringModel:
+    def __init__(self, pre, clf, reg):
+        self.pre, self.clf, self.reg = pre, clf, reg
+
+    def fit(self, X, y_cls, y_reg):
+        Xt = self.pre.fit_transform(X)
+        self.clf.fit(Xt, y_cls)
+        self.reg.fit(Xt, y_reg)
+        return self
+
+    def predict(self, X):
+        # (수주 확률, 예상 금액)
+        Xt = self.pre.transform(X)
+        return self.clf.predict_proba(Xt)[:,1], self.reg.predict(Xt)
+
+class PipelinePair:
+    # 예전 두 파일 형식: 각 Pipeline이 전처리를 따로 수행
+    def __init__(self, clf, reg):
+        self.clf, self.reg = clf, reg
+
+    def predict(self, X):
+        return self.clf.predict_proba(X)[:,1], self.reg.predict(X)
+
+def model_files(model_dir, joblib_ok=True):
+    # 로드할 모델 파일 경로, 없으면 None (joblib_ok=False면 scikit-learn 없이 읽을 수 있는 형식만)
+    manifest = os.path.join(model_dir, MANIFEST_FILE)
+    if os.path.exists(manifest):
+        return (manifest,)
+    if not joblib_ok:
+        return None
+    combined = os.path.join(model_dir, MODEL_FILE)
+    if os.path.exists(combined):
+        return (combined,)
+    legacy = tuple(os.path.join(model_dir, f) for f in LEGACY_FILES)
+    return legacy if all(os.path.exists(p) for p in legacy) else None
+
+def load_model(paths, mmap_mode=None):
+    if paths[0].endswith(".json"):
+        from npscorer import NumpyScoringModel
+        return NumpyScoringModel.load(paths[0])
+    import joblib
+    objs = [joblib.load(p, mmap_mode=mmap_mode) for p in paths]
+    return objs[0] if len(objs) == 1 else PipelinePair(*objs)
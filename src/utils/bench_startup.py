@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""CLI 콜드 스타트 시간 측정 + 회귀 검사.
+
+매 측정마다 새 파이썬 프로세스를 띄워 (import 캐시 없이) 벽시계 시간을 재고, 반복 중 최솟값을 쓴다.
+--db를 주면 score.py --mode score / --mode export 전체 실행도 DB 복사본에서 측정한다.
+
+  python src/utils/bench_startup.py --db build/ivd.db --save-baseline build/startup_baseline.json
+  python src/utils/bench_startup.py --db build/ivd.db --baseline build/startup_baseline.json   # 느려지면 exit 1
+  python src/utils/bench_startup.py --max-seconds 1.0 --no-heavy   # make test: 기준 파일 없이 절대 한도로 검사
+"""
+import argparse, os, sys, json, time, shutil, subprocess, tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+PIPELINES = os.path.join(ROOT, "src", "pipelines")
+HEAVY_MODULES = ("pandas", "numpy", "sklearn", "joblib", "scipy", "matplotlib", "seaborn", "openpyxl")
+
+# 프로세스 종료 직전에 어떤 무거운 모듈이 로드됐는지 stderr로 보고
+REPORT = ("import atexit, sys\n"
+          "atexit.register(lambda: sys.stderr.write('BENCH_MODULES=' + ','.join("
+          "m for m in %r if m in sys.modules) + '\\n'))\n") % (HEAVY_MODULES,)
+
+def run_once(argv, cwd):
+    # argv[0]이 스크립트 경로면 runpy로 __main__ 실행, 아니면 python -c 코드
+    if argv[0].endswith(".py"):
+        code = REPORT + f"import runpy; sys.argv = {argv!r}; runpy.run_path({argv[0]!r}, run_name='__main__')"
+    else:
+        code = REPORT + argv[0]
+    env = dict(os.environ, PYTHONPATH=PIPELINES + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-c", code], cwd=cwd, env=env, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"{argv} failed ({proc.returncode}):\n{proc.stderr[-2000:]}")
+    loaded = ""
+    for line in proc.stderr.splitlines():
+        if line.startswith("BENCH_MODULES="):
+            loaded = line.split("=", 1)[1]
+    return elapsed, loaded
+
+# --help / import 케이스: 무거운 모듈 없이 떠야 한다 (--no-heavy, --max-seconds 검사 대상)
+STARTUP_CASES = ("import score", "import ingest", "score.py --help", "ingest.py --help")
+
+def cases(db):
+    score = os.path.join(PIPELINES, "score.py")
+    ingest = os.path.join(PIPELINES, "ingest.py")
+    out = {
+        "import score": ["import score"],
+        "import ingest": ["import ingest"],
+        "score.py --help": [score, "--help"],
+        "ingest.py --help": [ingest, "--help"],
+    }
+    if db:
+        out["score --mode score"] = [score, "--db", db, "--mode", "score"]
+        out["score --mode export"] = [score, "--db", db, "--mode", "export"]
+    return out
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--db", help="SQLite DB to benchmark --mode score/export on (a temporary copy is used)")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--baseline", help="JSON from --save-baseline; exit 1 if any case is slower than allowed")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown vs baseline (0.25 = +25%%)")
+    ap.add_argument("--slack", type=float, default=0.05, help="extra absolute seconds allowed (timer noise)")
+    ap.add_argument("--save-baseline", help="write the measured times to this JSON file")
+    ap.add_argument("--max-seconds", type=float, help="exit 1 if an import/--help case takes longer than this (no baseline needed)")
+    ap.add_argument("--no-heavy", action="store_true", help="exit 1 if an import/--help case loads any of the heavy modules")
+    args = ap.parse_args()
+
+    work = tempfile.mkdtemp(prefix="bench_startup_")
+    try:
+        db = None
+        if args.db:
+            db = os.path.join(work, "bench.db")
+            shutil.copyfile(args.db, db)
+            shutil.copytree(os.path.join(ROOT, "sql"), os.path.join(work, "sql"))
+        results = {}
+        for name, argv in cases(db).items():
+            times, loaded = [], ""
+            for _ in range(args.repeat):
+                t, loaded = run_once(argv, work)
+                times.append(t)
+            results[name] = {"min": round(min(times), 4), "median": round(sorted(times)[len(times) // 2], 4), "modules": loaded}
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    failed = []
+    print(f"{'case':24s} {'min s':>8s} {'median s':>9s} {'limit s':>8s}  heavy modules loaded")
+    for name, r in results.items():
+        limit, allowed = "", None
+        if name in baseline:
+            allowed = baseline[name]["min"] * (1 + args.tolerance) + args.slack
+        if args.max_seconds is not None and name in STARTUP_CASES:
+            allowed = args.max_seconds if allowed is None else min(allowed, args.max_seconds)
+        if allowed is not None:
+            limit = f"{allowed:.3f}"
+            if r["min"] > allowed:
+                failed.append(name)
+                limit += " !"
+        if args.no_heavy and name in STARTUP_CASES and r["modules"]:
+            failed.append(name)
+        print(f"{name:24s} {r['min']:8.3f} {r['median']:9.3f} {limit:>8s}  {r['modules'] or '-'}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"Saved baseline → {args.save_baseline}")
+    if failed:
+        print(f"Startup regression: {', '.join(failed)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
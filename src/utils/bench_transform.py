@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""BI 정제 단계 벤치마크: bi_transform.transform_table vs 이전 구현 (백만 행 합성 테이블).
+
+이전 구현은 score.py의 _coerce_types_and_compute_columns(행별 apply로 기관규모/스코어등급)와
+powerbi_connector.py의 _apply_python_side_transformations(pd.cut + 날짜 컬럼 재파싱)를 그대로 옮겨 둔 것이다.
+결과가 같은지도 함께 확인한다 (다르면 exit 1). 기관규모/스코어등급은 이제 sql/bi_views.sql 뷰가 계산하므로
+합성 테이블에도 뷰가 붙여 주는 값으로 미리 넣어 둔다 (이전 구현은 그 컬럼을 다시 계산해 덮어쓴다).
+
+  python src/utils/bench_transform.py --rows 1000000
+"""
+import argparse, os, sys, time, datetime
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "pipelines"))
+from bi_transform import transform_table
+
+# ---- 이전 구현 (score.py) ----
+def _legacy_numeric(s):
+    return s if pd.api.types.is_numeric_dtype(s) else pd.to_numeric(s, errors='coerce')
+
+def _legacy_datetime(s):
+    return s if pd.api.types.is_datetime64_any_dtype(s) else pd.to_datetime(s, errors='coerce', format='ISO8601')
+
+def legacy_score(table, df):
+    df = df.copy()
+    if table == 'accounts':
+        for col in ['created_at', 'updated_at']:
+            df[col] = _legacy_datetime(df[col])
+        for col in ['bed_count', 'annual_test_volume']:
+            df[col] = _legacy_numeric(df[col]).astype('Int64')
+        def bucket(b):
+            if pd.isna(b):
+                return np.nan
+            if b >= 200:
+                return '대형'
+            if b >= 50:
+                return '중형'
+            return '소형'
+        df['기관규모'] = df['bed_count'].apply(bucket)
+    elif table == 'bi_scores_daily':
+        for col in ['run_date', 't0_date']:
+            df[col] = _legacy_datetime(df[col]).dt.date
+        for col in ['p_win_90d', 'expected_amount_180d', 'expected_value']:
+            df[col] = _legacy_numeric(df[col])
+        def grade(p):
+            if pd.isna(p):
+                return np.nan
+            if p >= 0.7:
+                return 'A'
+            if p >= 0.4:
+                return 'B'
+            return 'C'
+        df['스코어등급'] = df['p_win_90d'].apply(grade)
+    elif table == 'interactions':
+        df['occurred_at'] = _legacy_datetime(df['occurred_at'])
+    elif table == 'orders':
+        df['order_date'] = _legacy_datetime(df['order_date'])
+        df['total_amount'] = _legacy_numeric(df['total_amount'])
+    return df
+
+# ---- 이전 구현 (powerbi_connector.py) ----
+def legacy_connector(table, df):
+    df = df.copy()
+    if table == 'accounts':
+        df['기관규모'] = pd.cut(df['bed_count'], bins=[-float('inf'), 49, 199, float('inf')],
+                              labels=['소형', '중형', '대형']).astype(str)
+        for col in ['created_at', 'updated_at']:
+            df[col] = pd.to_datetime(df[col], errors='coerce').dt.strftime('%Y-%m-%d %H:%M:%S')
+    if table == 'bi_scores_daily':
+        df['스코어등급'] = pd.cut(df['p_win_90d'], bins=[-float('inf'), 0.4, 0.7, float('inf')],
+                               labels=['C', 'B', 'A']).astype(str)
+        for col in ['run_date', 't0_date']:
+            df[col] = pd.to_datetime(df[col], errors='coerce').dt.strftime('%Y-%m-%d')
+    for col in [c for c in df.columns if c.endswith('_date') or c.endswith('_at')]:
+        df[col] = pd.to_datetime(df[col], errors='coerce').dt.strftime('%Y-%m-%d %H:%M:%S')
+    return df
+
+def _view_bucket(values, edges, labels):
+    # sql/bi_views.sql의 CASE 식과 같은 값 (경계 이상이면 다음 라벨)
+    return np.asarray(labels, dtype=object)[np.searchsorted(edges, values, side="right")]
+
+def synthetic(table, n, seed=0):
+    # bi_export가 SQLite(뷰)에서 읽은 것과 같은 형태: 날짜는 ISO 문자열, 정수/실수는 숫자 dtype
+    rng = np.random.default_rng(seed)
+    days = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 600, n), unit="D")
+    stamps = (days + pd.to_timedelta(rng.integers(0, 86400, n), unit="s")).strftime('%Y-%m-%d %H:%M:%S')
+    if table == 'accounts':
+        return pd.DataFrame({
+            "account_id": np.arange(n), "account_name": "병원", "account_type": rng.choice(["병원", "검진센터", "의원"], n),
+            "bed_count": rng.integers(0, 800, n), "annual_test_volume": rng.integers(0, 10**6, n),
+            "city": rng.choice(["서울", "부산", "대구"], n), "state_region": "KR", "country": "KR",
+            "ownership_type": rng.choice(["공공", "민간"], n), "created_at": stamps, "updated_at": stamps}).assign(
+            기관규모=lambda d: _view_bucket(d["bed_count"], [50, 200], ["소형", "중형", "대형"]))
+    if table == 'bi_scores_daily':
+        p = rng.random(n)
+        return pd.DataFrame({
+            "run_date": days.strftime('%Y-%m-%d'), "account_id": np.arange(n), "t0_date": days.strftime('%Y-%m-%d'),
+            "p_win_90d": p, "expected_amount_180d": rng.random(n) * 1e6, "expected_value": p * 1e6,
+            "is_priority": (p >= 0.7).astype(int), "스코어등급": _view_bucket(p, [0.4, 0.7], ["C", "B", "A"])})
+    if table == 'interactions':
+        return pd.DataFrame({
+            "interaction_id": np.arange(n), "account_id": rng.integers(0, 20000, n), "contact_id": rng.integers(0, 50000, n),
+            "channel": rng.choice(["email", "call", "visit"], n), "outcome": rng.choice(["positive", "neutral"], n),
+            "occurred_at": stamps})
+    return pd.DataFrame({"order_id": np.arange(n), "account_id": rng.integers(0, 20000, n),
+                         "order_date": days.strftime('%Y-%m-%d'), "total_amount": rng.random(n) * 1e5})
+
+def same(a, b, text=False):
+    # 구간 컬럼: 이전 connector는 결측을 'nan' 문자열로 썼다 → 결측으로 맞춰 비교
+    # 날짜 컬럼(order_date 등)은 이제 Excel에 날짜로 쓰므로 datetime.date ↔ Timestamp를 같은 값으로 본다
+    a, b = a.astype(object), b.astype(object)
+    if text:
+        a = a.replace('nan', None)
+    else:
+        a, b = a.map(_as_timestamp), b.map(_as_timestamp)
+    a, b = a.where(a.notna(), None), b.where(b.notna(), None)
+    return list(a.columns) == list(b.columns) and a.equals(b)
+
+def _as_timestamp(v):
+    return pd.Timestamp(v) if isinstance(v, datetime.date) else v
+
+def timed(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, out
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=1000000)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--tables", default="accounts,bi_scores_daily,interactions,orders")
+    args = ap.parse_args()
+
+    ok = True
+    print(f"{'table':16s} {'path':10s} {'before s':>9s} {'after s':>8s} {'speedup':>8s}  same")
+    for table in args.tables.split(","):
+        df = synthetic(table, args.rows)
+        for path, legacy, output in (("score.py", legacy_score, "excel"), ("connector", legacy_connector, "text")):
+            t0, old = timed(lambda: legacy(table, df), args.repeat)
+            t1, new = timed(lambda: transform_table(table, df, output), args.repeat)
+            match = same(old, new, text=output == "text")
+            ok &= match
+            print(f"{table:16s} {path:10s} {t0:9.3f} {t1:8.3f} {t0 / t1:7.1f}x  {'yes' if match else 'NO'}")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
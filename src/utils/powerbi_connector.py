@@ -4,56 +4,29 @@
 Power BI용 SQLite 데이터 연결 도우미
 """
 import sqlite3
-import pandas as pd
 import os
+import sys
 
-def _apply_python_side_transformations(table_name: str, df: pd.DataFrame) -> pd.DataFrame:
-    """Power Query에서 하던 경량 전처리를 Python에서 수행한다.
+# 정제 규칙(bi_transform.py)과 Excel/Parquet 작성기(bi_export.py)는 score.py와 같은 것을 쓴다
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "pipelines"))
+from bi_export import (StreamingWorkbook, read_table_chunks, DEFAULT_EXPORT_CHUNK, load_export_state,
+                       save_export_state, table_signature, change_kind, file_digest, sheet_digests,
+                       sheets_digest, export_parquet, ensure_bi_views)
+from bi_transform import transform_table
 
-    - accounts: 기관규모 계산 컬럼 추가 (bed_count 기반)
-    - bi_scores_daily: 스코어등급 계산 컬럼 추가 (p_win_90d 기반)
-    - 날짜/시간 컬럼들은 ISO 문자열로 일관화
-    """
-    if table_name == 'accounts' and not df.empty:
-        # 안전한 형변환 후 기관 규모 범주화
-        if 'bed_count' in df.columns:
-            df['bed_count'] = pd.to_numeric(df['bed_count'], errors='coerce')
-            df['기관규모'] = pd.cut(
-                df['bed_count'],
-                bins=[-float('inf'), 49, 199, float('inf')],
-                labels=['소형', '중형', '대형']
-            ).astype(str)
-        # 날짜/시간 열 일관화
-        for col in ['created_at', 'updated_at']:
-            if col in df.columns:
-                df[col] = pd.to_datetime(df[col], errors='coerce').dt.strftime('%Y-%m-%d %H:%M:%S')
-
-    if table_name == 'bi_scores_daily' and not df.empty:
-        if 'p_win_90d' in df.columns:
-            df['p_win_90d'] = pd.to_numeric(df['p_win_90d'], errors='coerce')
-            df['스코어등급'] = pd.cut(
-                df['p_win_90d'],
-                bins=[-float('inf'), 0.4, 0.7, float('inf')],
-                labels=['C', 'B', 'A']
-            ).astype(str)
-        for col in ['run_date', 't0_date']:
-            if col in df.columns:
-                df[col] = pd.to_datetime(df[col], errors='coerce').dt.strftime('%Y-%m-%d')
-
-    # 경량 타입 표준화: 날짜/시간으로 보이는 컬럼은 ISO 문자열로
-    datetime_like_cols = [c for c in df.columns if c.endswith('_date') or c.endswith('_at')]
-    for col in datetime_like_cols:
-        df[col] = pd.to_datetime(df[col], errors='coerce').dt.strftime('%Y-%m-%d %H:%M:%S')
-
-    return df
-
-
-def export_for_powerbi(db_path, output_dir="powerbi_data", create_excel: bool = True, create_csv: bool = True):
+def export_for_powerbi(db_path, output_dir="powerbi_data", create_excel: bool = True, create_csv: bool = True,
+                       chunk_size: int = DEFAULT_EXPORT_CHUNK, incremental: bool = True,
+                       create_parquet: bool = False):
     """SQLite 데이터를 Power BI에서 사용할 수 있는 형태로 내보내기.
 
     - CSV: 테이블별 파일 생성
-    - Excel: 단일 통합 파일에 시트로 저장 (옵션)
+    - Excel: 단일 통합 파일에 시트로 저장 (옵션, 100만 행 초과 시 시트 분할)
+    - Parquet: parquet/ 폴더에 테이블별 타입 지정 파일 (옵션, pyarrow 필요)
     - Power Query 없이 바로 시각화가 가능하도록 경량 전처리 포함
+      (기관규모/스코어등급: sql/bi_views.sql 뷰, 날짜/시간 ISO 문자열화: src/pipelines/bi_transform.py)
+    - 테이블을 chunk_size 행씩 읽어 CSV/Excel에 이어 쓰므로 메모리는 chunk 크기만큼만 사용
+    - incremental: 지난 내보내기 이후 바뀌지 않은 테이블은 CSV/시트를 다시 쓰지 않고,
+      뒤에 행만 추가된 테이블은 CSV에 새 행만 덧붙인다 (bi_export_state)
     """
     
     if not os.path.exists(db_path):
@@ -66,6 +39,9 @@ def export_for_powerbi(db_path, output_dir="powerbi_data", create_excel: bool =
     con = sqlite3.connect(db_path)
     
     try:
+        # 파생 컬럼 뷰 (accounts, bi_scores_daily는 뷰에서 읽는다)
+        ensure_bi_views(con)
+
         # Power BI용 테이블들 내보내기
         tables_to_export = [
             'bi_scores_daily',
@@ -78,32 +54,94 @@ def export_for_powerbi(db_path, output_dir="powerbi_data", create_excel: bool =
             'opportunities'
         ]
         
-        # Excel 작성기 준비 (옵션)
+        # Excel 작성기 준비 (옵션, write-only 스트리밍)
         excel_path = os.path.join(output_dir, 'ivd_powerbi_data.xlsx') if create_excel else None
-        excel_writer = pd.ExcelWriter(excel_path, engine='openpyxl') if create_excel else None
+        book = StreamingWorkbook(excel_path) if create_excel else None
+
+        csv_target = "powerbi_connector.py:" + os.path.abspath(output_dir)
+        xlsx_target = "powerbi_connector.py:" + os.path.abspath(excel_path) if excel_path else None
+        csv_state = load_export_state(con, csv_target) if incremental else {}
+        xlsx_state = load_export_state(con, xlsx_target) if incremental and excel_path else {}
+        xlsx_digests = sheet_digests(excel_path) if excel_path else {}
+        signatures, rewritten = {}, []
 
         for table in tables_to_export:
+            csv_file, rows = None, 0
             try:
-                df = pd.read_sql_query(f"SELECT * FROM {table}", con)
-                df = _apply_python_side_transformations(table, df)
-                if not df.empty:
-                    if create_csv:
-                        output_file = os.path.join(output_dir, f"{table}.csv")
-                        df.to_csv(output_file, index=False, encoding='utf-8-sig')
-                        print(f"✓ {table} → {output_file} ({len(df)} 행)")
-                    if excel_writer is not None:
-                        # 시트 이름은 31자 제한 대응 위해 잘라냄
-                        sheet_name = table[:31]
-                        df.to_excel(excel_writer, sheet_name=sheet_name, index=False)
+                output_file = os.path.join(output_dir, f"{table}.csv")
+                prev_csv, prev_xlsx = csv_state.get(table), xlsx_state.get(table)
+                sig = signatures[table] = table_signature(con, table, prev_csv["rows"] if prev_csv else None)
+                csv_kind = change_kind(prev_csv, sig, file_digest(output_file)) if create_csv else "same"
+                xlsx_kind = (change_kind(prev_xlsx, sig, sheets_digest(xlsx_digests, prev_xlsx and prev_xlsx["sheets"]))
+                             if book is not None else "same")
+                # CSV에 이미 들어 있는 앞부분 행 수 (뒤에 행만 추가된 경우)
+                skip = prev_csv["rows"] if csv_kind == "append" else 0
+
+                def chunks(offset):
+                    # 정제한 chunk를 CSV에 이어 쓰면서 Excel 작성기로 넘긴다
+                    nonlocal csv_file, rows
+                    pos = offset
+                    for chunk in read_table_chunks(con, table, chunk_size, offset):
+                        chunk = transform_table(table, chunk, "text")
+                        if csv_kind != "same" and pos + len(chunk) > skip:
+                            tail = chunk.iloc[max(skip - pos, 0):]
+                            header = csv_file is None and not skip
+                            if csv_file is None:
+                                csv_file = (open(output_file, 'a', encoding='utf-8', newline='') if skip else
+                                            open(output_file, 'w', encoding='utf-8-sig', newline=''))
+                            tail.to_csv(csv_file, index=False, header=header)
+                            rows += len(tail)
+                        pos += len(chunk)
+                        yield chunk
+
+                if book is not None and xlsx_kind != "same":
+                    book.write_table(table, chunks(0))
+                    rewritten.append(table)
                 else:
+                    if book is not None:
+                        book.reuse_table(table, prev_xlsx["sheets"])
+                    if csv_kind != "same":
+                        for _ in chunks(skip):
+                            pass
+                if not sig or not sig[0]:
                     print(f"⚠ {table} 테이블이 비어있습니다")
+                elif create_csv:
+                    if csv_kind == "same":
+                        print(f"= {table} 변경 없음 ({sig[0]} 행)")
+                    elif csv_kind == "append":
+                        print(f"✓ {table} → {output_file} (+{rows} 행 추가, 총 {sig[0]} 행)")
+                    else:
+                        print(f"✓ {table} → {output_file} ({rows} 행)")
             except Exception as e:
+                signatures.pop(table, None)
                 print(f"✗ {table} 내보내기 실패: {e}")
+            finally:
+                if csv_file is not None:
+                    csv_file.close()
+            if create_csv and signatures.get(table):
+                save_export_state(con, csv_target, table, signatures[table], output_digest=file_digest(output_file))
         
-        if excel_writer is not None:
+        if create_parquet:
             try:
-                excel_writer.close()
-                print(f"✓ Excel 통합 파일 생성 → {excel_path}")
+                parquet_dir = os.path.join(output_dir, 'parquet')
+                written, skipped = export_parquet(con, parquet_dir, tables_to_export,
+                                                  lambda t, chunk: transform_table(t, chunk, "arrow"), chunk_size,
+                                                  target="powerbi_connector.py:" + os.path.abspath(parquet_dir),
+                                                  incremental=incremental)
+                print(f"✓ Parquet → {parquet_dir} (다시 쓴 파일 {written}개, 변경 없음 {skipped}개)")
+            except ImportError:
+                print("✗ Parquet 내보내기에는 pyarrow가 필요합니다 (pip install pyarrow)")
+
+        if book is not None:
+            try:
+                book.save()
+                xlsx_digests = sheet_digests(excel_path)
+                for table, sig in signatures.items():
+                    if sig is not None:
+                        save_export_state(con, xlsx_target, table, sig, book.tables[table],
+                                          sheets_digest(xlsx_digests, book.tables[table]))
+                print(f"✓ Excel 통합 파일 생성 → {excel_path} "
+                      f"(다시 쓴 시트 {len(rewritten)}개, 변경 없음 {len(book.tables) - len(rewritten)}개)")
             except Exception as e:
                 print(f"✗ Excel 파일 저장 실패: {e}")
         
@@ -113,6 +151,7 @@ def export_for_powerbi(db_path, output_dir="powerbi_data", create_excel: bool =
         else:
             print("Power BI에서 이 CSV 파일들을 불러오세요.")
         
+        con.commit()
         return True
         
     except Exception as e:
@@ -126,15 +165,12 @@ def create_powerbi_connection_string(db_path):
     return f"Data Source={os.path.abspath(db_path)};Version=3;"
 
 if __name__ == "__main__":
-    import sys
-    
-    if len(sys.argv) > 1:
-        db_path = sys.argv[1]
-    else:
-        db_path = "build/ivd.db"
+    # python src/utils/powerbi_connector.py [db_path] [--parquet]
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    db_path = args[0] if args else "build/ivd.db"
     
     print("Power BI용 데이터 내보내기 시작...")
-    success = export_for_powerbi(db_path)
+    success = export_for_powerbi(db_path, create_parquet="--parquet" in sys.argv[1:])
     
     if success:
         print("\n연결 문자열:")
@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+import os, sys, pathlib, sqlite3
+import pytest
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src" / "pipelines"))
+
+@pytest.fixture
+def landing_db(tmp_path):
+    """sql/ddl.sql + data/landing 적재 + sql/transform.sql까지 마친 임시 DB 연결."""
+    import ingest
+    con = sqlite3.connect(tmp_path / "ivd.db")
+    con.executescript((ROOT / "sql" / "ddl.sql").read_text(encoding="utf-8"))
+    ingest.ensure_ingest_log(con)
+    ingest.ingest_landing(con, str(ROOT / "data" / "landing"), workers=1)
+    ingest.run_transform(con, ROOT / "sql" / "transform.sql")
+    yield con
+    con.close()
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+import zipfile
+import pytest
+import score
+from bi_export import export_parquet
+
+def _export(con, path, capsys):
+    capsys.readouterr()
+    score.export_powerbi_excel(con, str(path))
+    out = capsys.readouterr().out
+    return out[out.index("(tables rewritten"):].strip()
+
+def _rezip(path, **kw):
+    # 같은 시트 XML을 다른 압축으로 다시 쓴다 (파일 크기만 바뀜)
+    with zipfile.ZipFile(path) as z:
+        parts = [(i, z.read(i.filename)) for i in z.infolist()]
+    with zipfile.ZipFile(path, "w", **kw) as z:
+        for info, data in parts:
+            z.writestr(info.filename, data)
+
+def test_excel_reuses_unchanged_tables_and_rewrites_changed(landing_db, tmp_path, capsys):
+    pytest.importorskip("openpyxl")
+    score.ensure_score_tables(landing_db)
+    path = tmp_path / "ivd_powerbi_data.xlsx"
+    assert _export(landing_db, path, capsys) == "(tables rewritten: 8, unchanged: 0)"
+    assert _export(landing_db, path, capsys) == "(tables rewritten: 0, unchanged: 8)"
+    # 내용이 같으면 파일 크기가 달라도 재사용
+    _rezip(path, compression=zipfile.ZIP_STORED)
+    assert _export(landing_db, path, capsys) == "(tables rewritten: 0, unchanged: 8)"
+
+    landing_db.execute("UPDATE products SET list_price = list_price + 1 WHERE rowid = 1")
+    assert _export(landing_db, path, capsys) == "(tables rewritten: 1, unchanged: 7)"
+    from openpyxl import load_workbook
+    price = landing_db.execute("SELECT list_price FROM products WHERE rowid = 1").fetchone()[0]
+    header, first = list(load_workbook(path, read_only=True)["products"].iter_rows(max_row=2, values_only=True))
+    assert first[header.index("list_price")] == pytest.approx(price)
+
+def test_excel_rewrites_sheets_changed_by_another_writer(landing_db, tmp_path, capsys):
+    pytest.importorskip("openpyxl")
+    score.ensure_score_tables(landing_db)
+    path = tmp_path / "ivd_powerbi_data.xlsx"
+    _export(landing_db, path, capsys)
+    # 다른 내보내기가 같은 파일의 products 시트를 다른 내용으로 덮어쓴 경우
+    landing_db.execute("UPDATE products SET list_price = list_price + 1 WHERE rowid = 1")
+    other = tmp_path / "other.xlsx"
+    score.export_powerbi_excel(landing_db, str(other), incremental=False)
+    landing_db.execute("UPDATE products SET list_price = list_price - 1 WHERE rowid = 1")
+    other.replace(path)
+    assert _export(landing_db, path, capsys) == "(tables rewritten: 1, unchanged: 7)"
+
+def test_parquet_reuse_and_invalidation(landing_db, tmp_path):
+    pytest.importorskip("pyarrow")
+    tables = ["accounts", "products", "orders"]
+    assert export_parquet(landing_db, str(tmp_path), tables) == (3, 0)
+    assert export_parquet(landing_db, str(tmp_path), tables) == (0, 3)
+    landing_db.execute("UPDATE products SET list_price = list_price + 1 WHERE rowid = 1")
+    assert export_parquet(landing_db, str(tmp_path), tables) == (1, 2)
+    # 크기가 같아도 내용이 바뀐 파일은 다시 쓴다
+    path = tmp_path / "orders.parquet"
+    data = bytearray(path.read_bytes())
+    data[len(data) // 2] ^= 0xFF
+    path.write_bytes(bytes(data))
+    assert export_parquet(landing_db, str(tmp_path), tables) == (1, 2)
@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+import pytest
+from feature_engine import check_parity, feature_view_at
+
+@pytest.mark.parametrize("t0", ["2025-03-01", "2025-09-01"])
+def test_vectorized_engine_matches_feature_view(landing_db, t0):
+    # 데이터 범위 안의 t0: 윈도우가 비어 있지 않아야 비교가 의미 있다
+    view = feature_view_at(landing_db, t0)
+    assert (view["orders_cnt_180d"] > 0).any() and (view["interactions_90d"] > 0).any()
+    assert check_parity(landing_db, t0) == []
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+import csv, shutil, sqlite3
+from conftest import ROOT
+from features import ensure_feature_store
+from ingest import _to_date, load_csv, ensure_ingest_log, ingest_landing, iter_text_batches, _parse_batch
+
+def test_to_date_normalizes_naive_values():
+    assert _to_date("2025-09-01") == "2025-09-01"
+    assert _to_date("2025-09-01T10:00:00") == "2025-09-01 10:00:00"
+    assert _to_date("2025-09-01 10:00") == "2025-09-01 10:00:00"
+    assert _to_date("") is None
+    assert _to_date("not a date") == "not a date"
+
+def test_to_date_keeps_offset_values_unchanged():
+    # 오프셋을 버리고 strftime하면 UTC 기준 날짜와 달라질 수 있으므로 원문 그대로 적재
+    assert _to_date("2025-09-01T10:00:00+09:00") == "2025-09-01T10:00:00+09:00"
+    assert _to_date("2025-09-01T01:30:00+09:00") == "2025-09-01T01:30:00+09:00"
+    assert _to_date("2025-09-01T10:00:00Z") == "2025-09-01T10:00:00Z"
+
+def test_upsert_counts_only_changed_rows_with_dirty_triggers(landing_db, tmp_path, capsys):
+    # 변경 추적 트리거가 있어도 upsert가 실패하지 않고, 트리거가 쓴 feature_dirty 행은 세지 않는다
+    ensure_feature_store(landing_db)
+    landing_db.execute("DELETE FROM feature_dirty")
+    src = sorted((ROOT / "data" / "landing").glob("*/orders_*.csv"))[-1]
+    rows = list(csv.reader(src.open(encoding="utf-8", newline="")))
+    rows[1][-1], rows[2][-1] = "1.5", "2.5"
+    edited = tmp_path / "orders.csv"
+    with edited.open("w", encoding="utf-8", newline="") as f:
+        csv.writer(f).writerows(rows)
+    capsys.readouterr()
+    load_csv(landing_db, "orders", str(edited), upsert=True)
+    assert "orders: 2 new/changed of" in capsys.readouterr().out
+    dirty = {a for (a,) in landing_db.execute("SELECT account_id FROM feature_dirty")}
+    assert dirty == {int(rows[1][1]), int(rows[2][1])}
+
+def test_upsert_reingest_updates_rows_in_place(tmp_path):
+    # 편집된 CSV를 --upsert로 다시 적재: 바뀐 행은 제자리 갱신, 새 행만 추가, CSV에서 빠진 행도 유지
+    landing = tmp_path / "landing"
+    shutil.copytree(ROOT / "data" / "landing", landing)
+    con = sqlite3.connect(tmp_path / "ivd.db")
+    con.executescript((ROOT / "sql" / "ddl.sql").read_text(encoding="utf-8"))
+    ensure_ingest_log(con)
+    ingest_landing(con, str(landing), upsert=True, workers=1)
+    before = dict(con.execute("SELECT order_id, total_amount FROM orders"))
+
+    src = sorted(landing.glob("*/orders_*.csv"))[-1]
+    rows = list(csv.reader(src.open(encoding="utf-8", newline="")))
+    header, body = rows[0], rows[1:]
+    edited_id, dropped_id = int(body[0][0]), int(body[-1][0])
+    body[0][header.index("total_amount")] = "1234.5"
+    new = list(body[1]); new[0] = str(max(before) + 1)
+    with src.open("w", encoding="utf-8", newline="") as f:
+        csv.writer(f).writerows([header] + body[:-1] + [new])
+    ingest_landing(con, str(landing), upsert=True, workers=1)
+
+    after = dict(con.execute("SELECT order_id, total_amount FROM orders"))
+    assert con.execute("SELECT COUNT(*) FROM orders").fetchone()[0] == len(after) == len(before) + 1
+    assert after[edited_id] == 1234.5
+    assert dropped_id in after
+    assert {k: v for k, v in after.items() if k not in (edited_id, int(new[0]))} == \
+           {k: v for k, v in before.items() if k != edited_id}
+    con.close()
+
+def test_text_batches_parse_like_csv_reader(tmp_path):
+    # 워커로 보내는 원문 배치는 따옴표 안 줄바꿈/이스케이프된 따옴표/CRLF가 있어도 csv.reader와 같은 행이 된다
+    path = tmp_path / "notes.csv"
+    path.write_bytes(b'id,note\r\n1,"a\r\nb"\r\n2,"say ""hi"""\r\n3,plain\r\n4,"x\ny\nz"\r\n5,\r\n')
+    with path.open(encoding="utf-8", newline="") as f:
+        expected = list(csv.reader(f))[1:]
+    for batch_size in (1, 2, 10):
+        with path.open(encoding="utf-8", newline="") as f:
+            header = next(csv.reader([f.readline()]))
+            rows = [r for text in iter_text_batches(f, batch_size) for r in _parse_batch("notes", header, text)]
+        assert rows == expected
+
+def test_parallel_casting_matches_single_worker(tmp_path):
+    dumps = []
+    for workers in (1, 2):
+        con = sqlite3.connect(tmp_path / f"w{workers}.db")
+        con.executescript((ROOT / "sql" / "ddl.sql").read_text(encoding="utf-8"))
+        ensure_ingest_log(con)
+        ingest_landing(con, str(ROOT / "data" / "landing"), batch_size=16, workers=workers)
+        tables = [t for (t,) in con.execute("SELECT name FROM sqlite_master WHERE type = 'table' "
+                                            "AND name != 'ingest_log' ORDER BY name")]
+        dumps.append({t: con.execute(f"SELECT * FROM {t} ORDER BY rowid").fetchall() for t in tables})
+        con.close()
+    assert dumps[0] == dumps[1]
+    assert sum(map(len, dumps[0].values())) > 0
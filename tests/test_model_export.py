@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+import score
+from model_export import export_model
+from scoring_model import ScoringModel, MANIFEST_FILE
+from npscorer import NumpyScoringModel
+
+sklearn = pytest.importorskip("sklearn")
+
+def test_numpy_scorer_matches_sklearn(landing_db, tmp_path):
+    from sklearn.compose import ColumnTransformer
+    from sklearn.impute import SimpleImputer
+    from sklearn.linear_model import LinearRegression, LogisticRegression
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+    df = score.fetch_features(landing_db, "view", "2025-06-01")
+    X = df.drop(columns=['y_close_90d', 'y_amount_180d', 't0_date', 'account_id', 'amt90', 'amt180'])
+    num_cols = X.select_dtypes(include=[np.number]).columns.tolist()
+    cat_cols = [c for c in X.columns if c not in num_cols]
+    pre = ColumnTransformer([
+        ("num", Pipeline([("impute", SimpleImputer(strategy="median")), ("scale", StandardScaler())]), num_cols),
+        ("cat", Pipeline([("impute", SimpleImputer(strategy="most_frequent")), ("ohe", OneHotEncoder(handle_unknown="ignore"))]), cat_cols)
+    ])
+    model = ScoringModel(pre, LogisticRegression(max_iter=1000), LinearRegression()).fit(
+        X, df['y_close_90d'].astype(int), df['y_amount_180d'].astype(float))
+    export_model(model, str(tmp_path))
+
+    # 결측과 학습 때 없던 범주도 sklearn과 같게 처리해야 한다
+    X_new = X.copy()
+    X_new.loc[X_new.index[:3], num_cols[0]] = np.nan
+    X_new.loc[X_new.index[3:6], cat_cols[0]] = "unseen"
+    X_new.loc[X_new.index[6:9], cat_cols[0]] = None
+    p, amt = NumpyScoringModel.load(str(tmp_path / MANIFEST_FILE)).predict(X_new)
+    Xt = model.pre.transform(X_new)
+    assert np.allclose(p, model.clf.predict_proba(Xt)[:, 1])
+    assert np.allclose(amt, model.reg.predict(Xt))
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+import sys
+import numpy as np
+import pytest
+import score
+from feature_engine import load_events, compute_features
+
+def test_t0_labels_look_forward_only(landing_db):
+    # --t0 라벨은 (t0, t0+90] / (t0, t0+180] 주문: feature_backfill(compute_features labels=True)과 같아야 한다
+    for t0 in ("2025-03-01", "2025-06-01"):
+        df = score.fetch_features(landing_db, "view", t0).set_index("account_id").sort_index()
+        ref = compute_features(load_events(landing_db), [t0], labels=True).set_index("account_id").sort_index()
+        assert (df["y_close_90d"] == ref["y_close_90d"]).all()
+        assert np.allclose(df["y_amount_180d"], ref["y_amount_180d"])
+        # 과거 90일 주문만 있는 계정은 양성이 아니다
+        past = landing_db.execute("SELECT DISTINCT account_id FROM orders WHERE date(order_date) <= date(?) "
+                                  "AND date(order_date) > date(?, '-90 days')", (t0, t0)).fetchall()
+        future = {a for (a,) in landing_db.execute("SELECT DISTINCT account_id FROM orders WHERE date(order_date) > date(?) "
+                                                   "AND date(order_date) <= date(?, '+90 days')", (t0, t0))}
+        for (a,) in past:
+            if a in df.index:
+                assert df.loc[a, "y_close_90d"] == int(a in future)
+
+def _daily(con, run_date):
+    return con.execute("SELECT account_id, p_win_90d, expected_amount_180d FROM bi_scores_daily "
+                       "WHERE run_date = ? ORDER BY account_id", (run_date,)).fetchall()
+
+def test_rerun_same_run_date_replaces_rows(landing_db, tmp_path, monkeypatch):
+    monkeypatch.setattr(score, "MODEL_DIR", tmp_path / "models")
+    score.score_today(landing_db, t0="2025-06-01")
+    first = _daily(landing_db, "2025-06-01")
+    score.score_today(landing_db, t0="2025-06-01", rescore_all=True)
+    assert _daily(landing_db, "2025-06-01") == first
+    assert len(first) == len({a for a, _, _ in first}) > 0
+
+def _insert_daily(con, rows):
+    con.executemany("INSERT INTO bi_scores_daily VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(d, a, d, p, p * 100, p * 50, int(p >= 0.5)) for d, a, p in rows])
+    con.commit()
+
+def test_compaction_keeps_history_totals(landing_db):
+    score.ensure_score_tables(landing_db)
+    days = [f"2025-0{m}-{d:02d}" for m in (3, 4) for d in (1, 10, 20)] + ["2025-09-01"]
+    rows = [(d, a, (i * 7 + a) % 10 / 10) for i, d in enumerate(days) for a in (1, 2)]
+    _insert_daily(landing_db, rows[:6])
+    _insert_daily(landing_db, rows[6:])
+    # 같은 달을 두 번에 나눠 압축해도 가중 평균/합계가 한 번에 압축한 것과 같아야 한다
+    assert score.compact_scores(landing_db, retain_days=150) == 8
+    _insert_daily(landing_db, [("2025-03-25", 1, 0.9), ("2025-03-25", 2, 0.3)])
+    assert score.compact_scores(landing_db, retain_days=90) == 6
+    old = [r for r in rows if r[0] < "2025-06-03"] + [("2025-03-25", 1, 0.9), ("2025-03-25", 2, 0.3)]
+    hist = landing_db.execute("SELECT account_id, period, days_scored, avg_p_win_90d, max_p_win_90d, priority_days "
+                              "FROM bi_scores_history").fetchall()
+    left = landing_db.execute("SELECT COUNT(*) FROM bi_scores_daily").fetchone()[0]
+    assert sum(h[2] for h in hist) + left == len(rows) + 2
+    for a, period, n, avg, mx, prio in hist:
+        ps = [p for d, acc, p in old if acc == a and d[:7] == period]
+        assert n == len(ps)
+        assert np.isclose(avg, sum(ps) / len(ps)) and mx == max(ps)
+        assert prio == sum(p >= 0.5 for p in ps)
+
+def test_compaction_keeps_t0_backfill_dates(landing_db, tmp_path, monkeypatch):
+    monkeypatch.setattr(score, "MODEL_DIR", tmp_path / "models")
+    score.score_today(landing_db, t0="2025-03-01")
+    backfill = _daily(landing_db, "2025-03-01")
+    _insert_daily(landing_db, [("2025-02-01", 1, 0.5), ("2025-09-01", 1, 0.5)])
+    assert score.compact_scores(landing_db, retain_days=90) == 1
+    assert _daily(landing_db, "2025-03-01") == backfill
+
+def test_only_changed_accounts_are_rescored(landing_db, tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(score, "MODEL_DIR", tmp_path / "models")
+    t0 = "2025-06-01"
+    score.score_today(landing_db, t0=t0, chunk_size=10)
+    before = dict((a, (p, amt)) for a, p, amt in _daily(landing_db, t0))
+    # 한 계정의 t0 직전 주문 금액만 바꾼다
+    order_id, account_id = landing_db.execute(
+        "SELECT order_id, account_id FROM orders WHERE date(order_date) <= date(?) "
+        "AND date(order_date) > date(?, '-90 days') ORDER BY order_id LIMIT 1", (t0, t0)).fetchone()
+    landing_db.execute("UPDATE orders SET total_amount = total_amount + 50000 WHERE order_id = ?", (order_id,))
+    capsys.readouterr()
+    score.score_today(landing_db, t0=t0, chunk_size=10)
+    assert f"Scored 1 accounts, carried forward {len(before) - 1} unchanged" in capsys.readouterr().out
+    after = dict((a, (p, amt)) for a, p, amt in _daily(landing_db, t0))
+    assert after.keys() == before.keys()
+    assert after[account_id] != before[account_id]
+    assert {a: v for a, v in after.items() if a != account_id} == {a: v for a, v in before.items() if a != account_id}
+
+def test_retrain_without_two_classes_exits_nonzero(landing_db, tmp_path, monkeypatch):
+    # t0 이후 주문이 없으면 라벨이 한 클래스뿐 → 모델을 저장하지 않고 NOT_TRAINED_EXIT (run_daily_scoring.bat이 확인)
+    pytest.importorskip("sklearn")
+    monkeypatch.setattr(score, "MODEL_DIR", str(tmp_path / "models"))
+    db = str(tmp_path / "ivd.db")
+    monkeypatch.setattr(sys, "argv", ["score.py", "--db", db, "--mode", "retrain", "--t0", "2025-09-30"])
+    assert score.main() == score.NOT_TRAINED_EXIT
+    assert not (tmp_path / "models").exists()
@@ -5,21 +5,47 @@ IVD Lead Scoring 데이터 시각화 분석 스크립트
 """
 
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import numpy as np
-from datetime import datetime
 import warnings
 warnings.filterwarnings('ignore')
-
-# 한글 폰트 설정
-import matplotlib.font_manager as fm
 import os
-import matplotlib
+import argparse, hashlib, inspect, json, importlib.util
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# pyarrow가 있으면 data/samples를 타입이 지정된 Parquet 스냅샷으로 캐시한다 (--render)
+PARQUET_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+DEFAULT_CACHE_DIR = os.path.join('build', 'visual_cache')
+
+SAMPLE_FILES = {
+    'accounts': 'data/samples/accounts.csv',
+    'opportunities': 'data/samples/opportunities.csv',
+    'orders': 'data/samples/orders.csv',
+    'interactions': 'data/samples/interactions.csv',
+    'products': 'data/samples/products.csv',
+    'install_base': 'data/samples/install_base.csv',
+    'bids': 'data/samples/bids.csv',
+    'service_tickets': 'data/samples/service_tickets.csv',
+    'web_events': 'data/samples/web_events.csv'
+}
+
+# 캐시에 datetime64로 저장할 날짜/일시 컬럼 (분석 함수의 pd.to_datetime은 그대로 통과)
+DATE_COLUMNS = {
+    'accounts': ['created_at', 'updated_at'],
+    'opportunities': ['expected_close_date', 'created_at', 'closed_at'],
+    'orders': ['order_date'],
+    'interactions': ['occurred_at'],
+    'install_base': ['install_date', 'warranty_end'],
+    'bids': ['bid_due_date', 'created_at'],
+    'service_tickets': ['opened_at', 'closed_at'],
+    'web_events': ['occurred_at']
+}
+
+# matplotlib은 import/폰트 검색 비용이 커서 모듈 import 때가 아니라 main()의 setup_plotting()에서 로드한다
+plt = None
 
 # Windows에서 사용 가능한 한글 폰트 찾기
 def find_korean_font():
     """사용 가능한 한글 폰트 찾기"""
+    import matplotlib.font_manager as fm
     # Windows 기본 한글 폰트들 (우선순위 순)
     font_list = [
         'Malgun Gothic',  # Windows 10/11 기본 한글 폰트
@@ -29,8 +55,8 @@ def find_korean_font():
         'DejaVu Sans'  # 기본 폰트
     ]
     
-    # 시스템에 설치된 폰트 목록 가져오기
-    available_fonts = [f.name for f in fm.fontManager.ttflist]
+    # 시스템에 설치된 폰트 목록 가져오기 (matplotlib이 캐시해 둔 목록; 매번 다시 만들지 않음)
+    available_fonts = {f.name for f in fm.fontManager.ttflist}
     
     for font in font_list:
         if font in available_fonts:
@@ -39,53 +65,29 @@ def find_korean_font():
     # 폰트를 찾지 못한 경우 기본 폰트 사용
     return 'DejaVu Sans'
 
-# 한글 폰트 설정
-korean_font = find_korean_font()
-plt.rcParams['font.family'] = korean_font
-plt.rcParams['axes.unicode_minus'] = False
-
-# matplotlib 캐시 클리어 (옵션)
-try:
-    matplotlib.font_manager._rebuild()
-except AttributeError:
-    # _rebuild 메서드가 없는 경우 무시
-    pass
-
-# 인코딩 설정
-os.environ['PYTHONIOENCODING'] = 'utf-8'
-
-print(f"사용 중인 폰트: {korean_font}")
-
-# 폰트 테스트
-try:
-    fig, ax = plt.subplots(figsize=(1, 1))
-    ax.text(0.5, 0.5, '한글 테스트', ha='center', va='center')
-    ax.set_xlim(0, 1)
-    ax.set_ylim(0, 1)
-    ax.axis('off')
-    plt.close(fig)
-    print("한글 폰트 테스트 성공")
-except Exception as e:
-    print(f"한글 폰트 테스트 실패: {e}")
+def setup_plotting(verbose=True):
+    """matplotlib 로드 및 한글 폰트 설정"""
+    global plt
+    import matplotlib.pyplot as pyplot
+    plt = pyplot
+
+    # 한글 폰트 설정
+    korean_font = find_korean_font()
+    plt.rcParams['font.family'] = korean_font
+    plt.rcParams['axes.unicode_minus'] = False
+
+    # 인코딩 설정
+    os.environ['PYTHONIOENCODING'] = 'utf-8'
+
+    if verbose:
+        print(f"사용 중인 폰트: {korean_font}")
 
 def load_data():
     """데이터 로드"""
     data = {}
     
     # CSV 파일들 로드
-    files = {
-        'accounts': 'data/samples/accounts.csv',
-        'opportunities': 'data/samples/opportunities.csv',
-        'orders': 'data/samples/orders.csv',
-        'interactions': 'data/samples/interactions.csv',
-        'products': 'data/samples/products.csv',
-        'install_base': 'data/samples/install_base.csv',
-        'bids': 'data/samples/bids.csv',
-        'service_tickets': 'data/samples/service_tickets.csv',
-        'web_events': 'data/samples/web_events.csv'
-    }
-    
-    for name, file_path in files.items():
+    for name, file_path in SAMPLE_FILES.items():
         try:
             data[name] = pd.read_csv(file_path)
             print(f"[OK] {name}: {len(data[name])} rows loaded")
@@ -438,9 +440,149 @@ def generate_summary_report(data):
     
     print("\n" + "=" * 60)
 
+# 그림 이름 → (분석 함수, 출력 파일, 입력 테이블)
+FIGURES = {
+    'accounts': (analyze_accounts, 'account_analysis.png', ['accounts']),
+    'opportunities': (analyze_opportunities, 'opportunity_analysis.png', ['opportunities']),
+    'interactions': (analyze_interactions, 'interaction_analysis.png', ['interactions']),
+    'orders': (analyze_orders, 'order_analysis.png', ['orders']),
+    'products': (analyze_products, 'product_analysis.png', ['products'])
+}
+
+def _read_json(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def _write_json(path, obj):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(obj, f, ensure_ascii=False, indent=2)
+
+def frame_hash(df):
+    """컬럼 이름/타입 + 행 내용(pandas 행 해시)으로 만든 내용 해시"""
+    h = hashlib.sha256(repr([(str(c), str(t)) for c, t in df.dtypes.items()]).encode())
+    h.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return h.hexdigest()
+
+def load_cached_data(cache_dir=DEFAULT_CACHE_DIR):
+    """타입이 지정된 Parquet 스냅샷에서 데이터 로드 (CSV가 바뀐 테이블만 다시 읽어 스냅샷 갱신).
+
+    (data, 테이블별 내용 해시)를 반환한다. pyarrow가 없으면 CSV를 읽어 날짜 타입만 맞춘다.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    manifest_path = os.path.join(cache_dir, 'manifest.json')
+    manifest = _read_json(manifest_path)
+    data, hashes = {}, {}
+    for name, file_path in SAMPLE_FILES.items():
+        snapshot = os.path.join(cache_dir, f'{name}.parquet')
+        try:
+            stat = os.stat(file_path)
+            source = [stat.st_size, stat.st_mtime_ns]
+            entry = manifest.get(name)
+            if PARQUET_AVAILABLE and entry and entry['source'] == source and os.path.exists(snapshot):
+                data[name], hashes[name] = pd.read_parquet(snapshot), entry['hash']
+                print(f"[CACHE] {name}: {len(data[name])} rows loaded")
+                continue
+            df = pd.read_csv(file_path)
+            for col in DATE_COLUMNS.get(name, []):
+                if col in df.columns:
+                    df[col] = pd.to_datetime(df[col], errors='coerce')
+            data[name], hashes[name] = df, frame_hash(df)
+            if PARQUET_AVAILABLE:
+                df.to_parquet(snapshot, index=False)
+                manifest[name] = {'source': source, 'hash': hashes[name], 'rows': len(df)}
+            print(f"[OK] {name}: {len(df)} rows loaded")
+        except Exception as e:
+            print(f"[ERROR] {name}: Error loading - {e}")
+    _write_json(manifest_path, manifest)
+    return data, hashes
+
+def figure_hash(name, hashes):
+    """입력 테이블 해시 + 분석 함수 코드: 데이터나 그리는 코드가 바뀐 그림만 다시 그린다"""
+    func, _, tables = FIGURES[name]
+    h = hashlib.sha256(inspect.getsource(func).encode())
+    for table in tables:
+        h.update(hashes[table].encode())
+    return h.hexdigest()
+
+def render_figure(name, frames):
+    """그림 하나를 Agg 백엔드(화면 없음)로 그려 저장 (워커 프로세스마다 matplotlib을 한 번만 설정)"""
+    if plt is None:
+        import matplotlib
+        matplotlib.use('Agg')
+        setup_plotting(verbose=False)
+    func, path, _ = FIGURES[name]
+    func(frames)
+    plt.close('all')
+    return name, path
+
+def render_figures(data, hashes, cache_dir=DEFAULT_CACHE_DIR, workers=None, force=False):
+    """입력이 바뀐 그림만 그림마다 프로세스 하나씩 병렬로 다시 그린다.
+
+    (다시 그린 수, 입력 데이터가 없어 건너뛴 수, 입력 변경이 없어 건너뛴 수) 반환
+    """
+    state_path = os.path.join(cache_dir, 'figures.json')
+    state = _read_json(state_path)
+    todo, missing = {}, 0
+    for name, (_, path, tables) in FIGURES.items():
+        if any(t not in data for t in tables):
+            print(f"[SKIP] {path}: 입력 데이터 없음")
+            missing += 1
+            continue
+        digest = figure_hash(name, hashes)
+        if not force and state.get(path) == digest and os.path.exists(path):
+            print(f"[SKIP] {path}: 입력 변경 없음")
+            continue
+        todo[name] = digest
+
+    workers = min(workers or os.cpu_count() or 1, len(todo))
+    jobs = {name: {t: data[t] for t in FIGURES[name][2]} for name in todo}
+    try:
+        if workers > 1:
+            with ProcessPoolExecutor(workers) as pool:
+                futures = [pool.submit(render_figure, name, frames) for name, frames in jobs.items()]
+                for future in as_completed(futures):
+                    name, path = future.result()
+                    state[path] = todo[name]
+                    print(f"[DONE] {path}")
+        else:
+            for name, frames in jobs.items():
+                name, path = render_figure(name, frames)
+                state[path] = todo[name]
+                print(f"[DONE] {path}")
+    finally:
+        # 일부 그림이 실패해도 끝난 그림의 해시는 남긴다
+        _write_json(state_path, state)
+    return len(todo), missing, len(FIGURES) - len(todo) - missing
+
 def main():
     """메인 실행 함수"""
+    ap = argparse.ArgumentParser(description="IVD Lead Scoring data visualizations (data/samples → *_analysis.png)")
+    ap.add_argument("--render", action="store_true",
+                    help="headless mode: one process per figure (Agg backend), inputs from the typed cache, "
+                         "figures whose input hash is unchanged are skipped")
+    ap.add_argument("--workers", type=int, default=None, help="--render processes (default: CPU count)")
+    ap.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Parquet snapshot of data/samples + figure hashes")
+    ap.add_argument("--force", action="store_true", help="--render: redraw every figure")
+    args = ap.parse_args()
+
     print("IVD Lead Scoring 데이터 분석 시작...")
+    if args.render:
+        data, hashes = load_cached_data(args.cache_dir)
+        if not data:
+            print("데이터 로드 실패")
+            return
+        print()
+        rendered, missing, unchanged = render_figures(data, hashes, args.cache_dir, args.workers, args.force)
+        if all(name in data for name in SAMPLE_FILES):
+            generate_summary_report(data)
+        else:
+            print("요약 보고서 생략: 입력 데이터 없음", sorted(set(SAMPLE_FILES) - set(data)))
+        print(f"\n분석 완료! 그래프 {rendered}개 저장, {unchanged}개는 입력 변경 없음, {missing}개는 입력 데이터 없음.")
+        return
+
+    setup_plotting()
     
     # 데이터 로드
     data = load_data()